@@ -0,0 +1,395 @@
+# Benchmarks for the engine. Each one prints a small table and can be run on its own:
+#   python bench.py parallel [--depth 3] [--max-workers N]
+#   python bench.py pgn [--games 200] [--file games.pgn]
+#   python bench.py book book.bin [--probes 100000]
+#   python bench.py movegen [--rounds 2000]
+#   python bench.py search [--depth 4]
+#   python bench.py attacks [--positions 20] [--rounds 200]   (main.py's Game; needs pygame installed)
+#   python bench.py render [--frames 200]   (both GUIs on SDL's dummy video driver; needs pygame)
+
+import argparse
+import gc
+import io
+import os
+import random
+import sys
+import time
+from typing import List, Optional
+
+from engine import Game, Pawn, Knight, Bishop, Rook, Queen, King, in_bounds
+from opening_book import ENTRY, KEY, OpeningBook
+from parallel import ParallelSearcher
+from pgn import read_games, write_game
+from perft import REFERENCE_POSITIONS
+
+BENCH_POSITIONS = [fen for name, fen, counts in REFERENCE_POSITIONS if name in ("start", "kiwipete", "middlegame")]
+
+
+def bench_parallel(depth: int = 3, max_workers: Optional[int] = None):
+    """Times a fixed-depth root-parallel search over the bench positions for 1, 2, 4, ... workers."""
+    max_workers = max_workers or os.cpu_count() or 1
+    counts = sorted({1, max_workers} | {n for n in (2, 4, 8, 16, 32, 64) if n < max_workers})
+    print(f"Root-parallel search, depth {depth}, {len(BENCH_POSITIONS)} positions")
+    print(f"{'workers':>7} {'time (s)':>9} {'speedup':>8} {'nodes':>9}  moves")
+    baseline = None
+    # Scores rather than moves are compared: the serial search shuffles equally good root moves
+    serial_scores = []
+    for fen in BENCH_POSITIONS:
+        game = Game.from_fen(fen)
+        game.use_quiescence = False
+        game.find_best_move(max_depth=depth)
+        serial_scores.append(game.search_info["score"])
+    for workers in counts:
+        with ParallelSearcher(workers) as searcher:
+            # The workers search copies of the game, so they must see its settings too
+            for fen, serial_score in zip(BENCH_POSITIONS, serial_scores):
+                game = Game.from_fen(fen)
+                game.use_quiescence = False
+                searcher.find_best_move(game, max_depth=depth)
+                assert searcher.search_info["score"] == serial_score, fen
+            # One throwaway search so process start-up is not timed
+            searcher.find_best_move(Game.from_fen(BENCH_POSITIONS[0]), max_depth=1)
+            moves, nodes = [], 0
+            start = time.perf_counter()
+            for fen in BENCH_POSITIONS:
+                moves.append(searcher.find_best_move(Game.from_fen(fen), max_depth=depth))
+                nodes += searcher.search_info["nodes"]
+            elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>7} {elapsed:>9.2f} {baseline / elapsed:>7.2f}x {nodes:>9}  {moves}")
+
+
+def random_games_pgn(count: int, max_plies: int = 120, seed: int = 0) -> str:
+    """PGN text of count random games, to benchmark on when no collection is given."""
+    rng = random.Random(seed)
+    out = io.StringIO()
+    for i in range(count):
+        game = Game()
+        for _ in range(rng.randint(max_plies // 2, max_plies)):
+            moves = game.perft_moves()
+            if not moves:
+                break
+            game.push(rng.choice(moves))
+        write_game(out, game, {"Event": "Random bench", "Round": str(i + 1)})
+    return out.getvalue()
+
+
+def bench_pgn(games: int = 200, path: Optional[str] = None):
+    """Games/second for parsing a PGN stream, and for parsing plus replaying every move."""
+    text = random_games_pgn(games) if path is None else None
+    print(f"PGN throughput, {path or f'{games} random games'}")
+    for label, replay in (("parse", False), ("parse + replay", True)):
+        count, plies = 0, 0
+        start = time.perf_counter()
+        with (io.StringIO(text) if text is not None else open(path, encoding="utf-8", errors="replace")) as stream:
+            for pgn_game in read_games(stream):
+                if replay:
+                    pgn_game.replay()
+                count += 1
+                plies += len(pgn_game.moves)
+        elapsed = time.perf_counter() - start
+        print(f"{label:>15}: {count} games, {plies} moves in {elapsed:.2f}s  "
+              f"{count / elapsed:,.0f} games/s  {plies / elapsed:,.0f} moves/s")
+
+
+def bench_book(path: str, probes: int = 100000):
+    """Microseconds per probe of an opening book, for keys in the book and keys that miss."""
+    book = OpeningBook(path)
+    start = time.perf_counter()
+    entries = len(book)
+    print(f"Opening book {path}: {entries} entries, opened in {(time.perf_counter() - start) * 1e6:.0f} us")
+    if entries == 0:
+        return
+    rng = random.Random(0)
+    with open(path, "rb") as f:
+        data = f.read()
+    hits = [KEY.unpack_from(data, rng.randrange(entries) * ENTRY.size)[0] for _ in range(1000)]
+    misses = [rng.getrandbits(64) for _ in range(1000)]
+    for label, keys in (("hit", hits), ("miss", misses)):
+        start = time.perf_counter()
+        for i in range(probes):
+            book.probe(keys[i % 1000])
+        elapsed = time.perf_counter() - start
+        print(f"{label:>5}: {elapsed / probes * 1e6:.2f} us/probe")
+    book.close()
+
+
+def _offset_moves(p, game: Game) -> list:
+    """gen_moves as it was before the lookup tables, walking offsets with bounds checks. Kept for comparison."""
+    arr = game.arr
+    moves = []
+    if isinstance(p, Pawn):
+        dr = 1 if p.color == "white" else -1
+        r1 = p.row + dr
+        if in_bounds(r1, p.col) and arr[r1-1][p.col-1] == " ":
+            moves.append((r1, p.col))
+            r2 = p.row + 2 * dr
+            if not p.moved and p.row == (2 if p.color == "white" else 7) and arr[r2-1][p.col-1] == " ":
+                moves.append((r2, p.col))
+        for dc in (-1, 1):
+            r, c = r1, p.col + dc
+            if in_bounds(r, c) and (p.is_enemy(arr, r, c) or game.en_passant_target == (r, c)):
+                moves.append((r, c))
+    elif isinstance(p, (Knight, King)):
+        for dr, dc in p.DELTAS:
+            r, c = p.row + dr, p.col + dc
+            if in_bounds(r, c) and (arr[r-1][c-1] == " " or p.is_enemy(arr, r, c)):
+                moves.append((r, c))
+        if isinstance(p, King) and not p.moved and not game.in_check(p.color):
+            row = 1 if p.color == "white" else 8
+            if game.can_castle(p.color, king_side=True):
+                moves.append((row, 7))
+            if game.can_castle(p.color, king_side=False):
+                moves.append((row, 3))
+    else:
+        for dr, dc in p.directions:
+            r, c = p.row + dr, p.col + dc
+            while in_bounds(r, c):
+                if arr[r-1][c-1] == " ":
+                    moves.append((r, c))
+                else:
+                    if p.is_enemy(arr, r, c):
+                        moves.append((r, c))
+                    break
+                r += dr
+                c += dc
+    return moves
+
+
+def bench_movegen(rounds: int = 2000):
+    """Per piece type: microseconds per gen_moves call, walking offsets versus the lookup tables."""
+    games = [Game.from_fen(fen) for _, fen, _ in REFERENCE_POSITIONS]
+    print(f"Move generation per piece, {len(games)} positions x {rounds} rounds")
+    print(f"{'piece':>7} {'offsets (us)':>13} {'tables (us)':>12} {'speedup':>8}")
+    for cls in (Pawn, Knight, Bishop, Rook, Queen, King):
+        work = [(p, game) for game in games for p in game.pieces.values() if type(p) is cls]
+        for p, game in work:
+            assert sorted(_offset_moves(p, game)) == sorted(p.gen_moves(game)), (cls.__name__, p.pos())
+        timings = []
+        for gen in (_offset_moves, lambda p, game: p.gen_moves(game)):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                for p, game in work:
+                    gen(p, game)
+            timings.append((time.perf_counter() - start) / (rounds * len(work)) * 1e6)
+        print(f"{cls.__name__:>7} {timings[0]:>13.2f} {timings[1]:>12.2f} {timings[0] / timings[1]:>7.2f}x")
+
+
+def bench_search(depth: int = 4):
+    """Fixed-depth search of the bench positions: nodes/second and garbage collections per 1000 nodes."""
+    print(f"Fixed-depth search, depth {depth}, {len(BENCH_POSITIONS)} positions")
+    print(f"{'position':>9} {'nodes':>8} {'time (s)':>9} {'nodes/s':>8} {'gc/1k nodes':>12}  move")
+    total_nodes, total_time, total_gc = 0, 0.0, 0
+    for i, fen in enumerate(BENCH_POSITIONS, 1):
+        game = Game.from_fen(fen)
+        random.seed(0)
+        gc_before = sum(stat["collections"] for stat in gc.get_stats())
+        start = time.perf_counter()
+        move = game.find_best_move(max_depth=depth)
+        elapsed = time.perf_counter() - start
+        collections = sum(stat["collections"] for stat in gc.get_stats()) - gc_before
+        nodes = game.search_info["nodes"]
+        total_nodes, total_time, total_gc = total_nodes + nodes, total_time + elapsed, total_gc + collections
+        print(f"{i:>9} {nodes:>8} {elapsed:>9.2f} {nodes / elapsed:>8.0f} {1000 * collections / nodes:>12.2f}  {move}")
+    print(f"{'total':>9} {total_nodes:>8} {total_time:>9.2f} {total_nodes / total_time:>8.0f} "
+          f"{1000 * total_gc / total_nodes:>12.2f}")
+
+
+def _scan_is_attacked(game, pos, by_color: str) -> bool:
+    """main.py's Game.is_attacked as it was before the reverse lookup, looping over every enemy piece."""
+    import main as shell
+    opponent_color = "white" if by_color == "black" else "black"
+    for piece in game.pieces:
+        if piece.color != opponent_color:
+            continue
+        if isinstance(piece, shell.Pawn):
+            direction = 1 if piece.color == "white" else -1
+            if (piece.row + direction, piece.col - 1) == pos or (piece.row + direction, piece.col + 1) == pos:
+                return True
+        elif isinstance(piece, (shell.Knight, shell.King)):
+            for dr, dc in piece.get_possible_move_vectors():
+                if (piece.row + dr, piece.col + dc) == pos:
+                    return True
+        else:
+            for dr, dc in piece.get_possible_move_vectors():
+                for i in range(1, 8):
+                    end_row, end_col = piece.row + dr * i, piece.col + dc * i
+                    if not (1 <= end_row <= 8 and 1 <= end_col <= 8):
+                        break
+                    if (end_row, end_col) == pos:
+                        return True
+                    if game.piece_at((end_row, end_col)):
+                        break
+    return False
+
+
+def _check_capture_promotion():
+    """main.py's Game: after bxa1=Q the captured rook is gone from game.pieces and moves still generate."""
+    import main as shell
+    game = shell.Game()
+    game.pieces, game.board = [], {}
+    game.kings = {"white": shell.King(3, 8, "white"), "black": shell.King(8, 8, "black")}
+    for piece in (game.kings["white"], game.kings["black"], shell.Rook(1, 1, "white"), shell.Pawn(2, 2, "black")):
+        game.add_piece(piece)
+    game.to_move = "black"
+    assert game.make_move((2, 2), (1, 1), promo_piece="q")
+    assert [type(p).__name__ for p in game.captured_pieces["black"]] == ["Rook"]
+    assert all(game.board[p.pos()] is p for p in game.pieces) and len(game.pieces) == len(game.board)
+    assert isinstance(game.piece_at((1, 1)), shell.Queen)
+    game.get_all_legal_moves("white")
+    game.get_all_legal_moves("black")
+
+
+def bench_attacks(positions: int = 20, rounds: int = 200):
+    """main.py's Game: microseconds per is_attacked and in_check call, piece scan versus reverse lookup."""
+    import main as shell
+    _check_capture_promotion()
+    rng = random.Random(0)
+    random.seed(0)  # the strategies draw from the random module
+    games = []
+    for _ in range(positions):
+        # Positions come from AI self-play, promotions included, as in the GUI
+        game = shell.Game()
+        players = {"white": shell.AIOpponent(game, shell.RandomStrategy()),
+                   "black": shell.AIOpponent(game, shell.GreedyCaptureStrategy())}
+        for _ in range(rng.randint(10, 120)):
+            if not players[game.to_move].make_move():
+                break
+        games.append(game)
+    squares = [(r, c) for r in range(1, 9) for c in range(1, 9)]
+    for game in games:
+        for pos in squares:
+            for color in ("white", "black"):
+                assert _scan_is_attacked(game, pos, color) == game.is_attacked(pos, color), (pos, color)
+    print(f"main.py attack detection, {positions} positions x {rounds} rounds")
+    print(f"{'call':>11} {'scan (us)':>10} {'lookup (us)':>12} {'speedup':>8}")
+    checks = [(game, game.kings[color].pos(), color) for game in games for color in ("white", "black")]
+    every_square = [(game, pos, color) for game in games for pos in squares for color in ("white", "black")]
+    for label, work, repeat in (("is_attacked", every_square, max(1, rounds // 20)), ("in_check", checks, rounds)):
+        timings = []
+        for test in (_scan_is_attacked, lambda game, pos, color: game.is_attacked(pos, color)):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                for game, pos, color in work:
+                    test(game, pos, color)
+            timings.append((time.perf_counter() - start) / (repeat * len(work)) * 1e6)
+        print(f"{label:>11} {timings[0]:>10.2f} {timings[1]:>12.2f} {timings[0] / timings[1]:>7.2f}x")
+
+
+class _CountingFont:
+    """Wraps a pygame font and counts its render() calls."""
+
+    def __init__(self, font, counter: List[int]):
+        self.font = font
+        self.counter = counter
+
+    def render(self, *args):
+        self.counter[0] += 1
+        return self.font.render(*args)
+
+    def __getattr__(self, name):
+        return getattr(self.font, name)
+
+
+def bench_render(frames: int = 200):
+    """Surfaces allocated and milliseconds per frame by both GUIs, drawing to SDL's dummy video driver.
+
+    Every surface counts: pygame.Surface(), font.render() and pygame.transform.scale().
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    counter = [0]
+
+    class CountingSurface(pygame.Surface):
+        def __init__(self, *args, **kwargs):
+            counter[0] += 1
+            super().__init__(*args, **kwargs)
+
+    def counting_scale(*args, **kwargs):
+        counter[0] += 1
+        return scale(*args, **kwargs)
+
+    scale = pygame.transform.scale
+    pygame.Surface, pygame.transform.scale = CountingSurface, counting_scale
+
+    import Chessboard
+    import main as shell
+    guis = []
+    Chessboard.init_display()
+    guis.append(("Chessboard", Chessboard, Chessboard.ChessGUI(Game()), "Player"))
+    pygame.display.quit()
+    shell.init_display()
+    shell_game = shell.Game()
+    guis.append(("main", shell, shell.ChessGUI(shell_game, shell.AIOpponent(shell_game)), "Game"))
+    print(f"GUI frames, {frames} per case")
+    print(f"{'gui':>10} {'case':>12} {'surfaces/frame':>15} {'ms/frame':>9}")
+    for name, module, gui, mode in guis:
+        for font in ("FONT", "LARGE_FONT", "BOLD_FONT", "PIECE_FONT"):
+            if getattr(module, font, None) is not None:
+                setattr(module, font, _CountingFont(getattr(module, font), counter))
+        module.screen = pygame.display.set_mode((module.SCREEN_WIDTH, module.SCREEN_HEIGHT))
+        gui.game_mode = mode
+        render = gui.render if name == "Chessboard" else gui.render_game
+        # A selected piece alternating between two squares dirties its squares and targets every frame
+        pieces = [p for p in list(gui.game.pieces.values() if name == "Chessboard" else gui.game.pieces)
+                  if p.color == "white" and gui.game.legal_moves_for(p)][:2]
+        cases = (("full redraw", lambda i: gui.renderer.invalidate()),
+                 ("selection", lambda i: (setattr(gui, "selected", pieces[i % 2].pos()),
+                                          setattr(gui, "valid_moves", gui.game.legal_moves_for(pieces[i % 2])))),
+                 ("idle", lambda i: None))
+        for case, change in cases:
+            change(0)
+            render()  # the first frame fills the cache
+            counter[0] = 0
+            start = time.perf_counter()
+            for i in range(frames):
+                change(i)
+                render()
+            elapsed = time.perf_counter() - start
+            print(f"{name:>10} {case:>12} {counter[0] / frames:>15.2f} {elapsed / frames * 1000:>9.3f}")
+    pygame.quit()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Engine benchmarks.")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    p = sub.add_parser("parallel", help="speedup of the root-parallel search from 1 to N workers")
+    p.add_argument("--depth", type=int, default=3)
+    p.add_argument("--max-workers", type=int, default=None)
+    p = sub.add_parser("pgn", help="PGN parse and replay throughput in games/second")
+    p.add_argument("--games", type=int, default=200, help="random games to generate when no --file is given")
+    p.add_argument("--file", default=None, help="PGN collection to read instead")
+    p = sub.add_parser("book", help="opening book probe time")
+    p.add_argument("path")
+    p.add_argument("--probes", type=int, default=100000)
+    p = sub.add_parser("movegen", help="per-piece move generation, offsets versus lookup tables")
+    p.add_argument("--rounds", type=int, default=2000)
+    p = sub.add_parser("search", help="fixed-depth search speed and garbage collections")
+    p.add_argument("--depth", type=int, default=4)
+    p = sub.add_parser("render", help="surfaces allocated and time per GUI frame")
+    p.add_argument("--frames", type=int, default=200)
+    p = sub.add_parser("attacks", help="main.py attack detection, piece scan versus reverse lookup")
+    p.add_argument("--positions", type=int, default=20)
+    p.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.bench == "parallel":
+        bench_parallel(args.depth, args.max_workers)
+    elif args.bench == "pgn":
+        bench_pgn(args.games, args.file)
+    elif args.bench == "book":
+        bench_book(args.path, args.probes)
+    elif args.bench == "movegen":
+        bench_movegen(args.rounds)
+    elif args.bench == "search":
+        bench_search(args.depth)
+    elif args.bench == "attacks":
+        bench_attacks(args.positions, args.rounds)
+    elif args.bench == "render":
+        bench_render(args.frames)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1672 @@
+# Headless chess engine: board, pieces, move generation, evaluation and search.
+# Has no pygame dependency, so batch jobs and worker processes can import Game without
+# opening a window, probing audio devices or loading fonts. The GUI lives in Chessboard.py.
+
+from typing import List, Tuple, Dict, Optional
+from array import array
+import random
+import time
+
+# --- BOARD CLASS ---
+class Board:
+    def __init__(self):
+        self.array = [[" " for _ in range(8)] for _ in range(8)]
+
+    def return_array(self) -> list:
+        return self.array
+
+    def Put_piece(self, r: int, c: int, piece: str):
+        self.array[r-1][c-1] = piece
+
+    def erase_x(self):
+        for i in range(8):
+            for j in range(8):
+                if self.array[i][j] == "x":
+                    self.array[i][j] = " "
+
+# --- HELPERS ---
+FILE_TO_COL = {c: i+1 for i, c in enumerate("abcdefgh")}
+COL_TO_FILE = {v: k for k, v in FILE_TO_COL.items()}
+Position = Tuple[int, int]
+
+def in_bounds(r: int, c: int) -> bool:
+    return 1 <= r <= 8 and 1 <= c <= 8
+
+def algebraic_to_pos(s: str) -> Position:
+    if len(s) != 2 or s[0] not in FILE_TO_COL or not s[1].isdigit():
+        raise ValueError("Invalid square: " + s)
+    col = FILE_TO_COL[s[0]]
+    row = int(s[1])
+    if not in_bounds(row, col):
+        raise ValueError("Square out of bounds: " + s)
+    return (row, col)
+
+def pos_to_algebraic(pos: Position) -> str:
+    r, c = pos
+    return f"{COL_TO_FILE[c]}{r}"
+
+# --- LOOKUP TABLES ---
+# Built once at import and indexed by square 0..63 (a1 = 0). Each entry is ((r, c), r-1, c-1):
+# the target position and its board array indices, so move generation walks a list instead
+# of adding offsets and checking bounds, and reuses the position tuples.
+def target_table(deltas) -> List[tuple]:
+    """Per square, the entries one offset away that are on the board."""
+    table = []
+    for sq in range(64):
+        r0, c0 = sq // 8 + 1, sq % 8 + 1
+        table.append(tuple(((r0 + dr, c0 + dc), r0 + dr - 1, c0 + dc - 1)
+                           for dr, dc in deltas if in_bounds(r0 + dr, c0 + dc)))
+    return table
+
+def direction_rays(dr: int, dc: int) -> List[tuple]:
+    """Per square, the entries along one direction, nearest first."""
+    table = []
+    for sq in range(64):
+        r, c = sq // 8 + 1 + dr, sq % 8 + 1 + dc
+        ray = []
+        while in_bounds(r, c):
+            ray.append(((r, c), r - 1, c - 1))
+            r += dr
+            c += dc
+        table.append(tuple(ray))
+    return table
+
+ROOK_DIRS = [(1,0),(-1,0),(0,1),(0,-1)]
+BISHOP_DIRS = [(1,1),(1,-1),(-1,1),(-1,-1)]
+RAYS = {d: direction_rays(*d) for d in ROOK_DIRS + BISHOP_DIRS}
+
+def ray_table(directions) -> List[tuple]:
+    """Per square, the non-empty rays of a slider moving in the given directions."""
+    return [tuple(RAYS[d][sq] for d in directions if RAYS[d][sq]) for sq in range(64)]
+
+# Squares a pawn of each colour captures on, by the pawn's square
+PAWN_CAPTURES = {"white": target_table([(1,-1),(1,1)]), "black": target_table([(-1,-1),(-1,1)])}
+# Squares a pawn of each colour attacks a square from, by the attacked square
+PAWN_ATTACKERS = {"white": PAWN_CAPTURES["black"], "black": PAWN_CAPTURES["white"]}
+
+# --- PIECE CLASSES ---
+class Piece:
+    # No per-instance __dict__: pieces are small and created for every position copy
+    __slots__ = ("row", "col", "color", "symbol", "moved")
+
+    def __init__(self, row: int, col: int, symbol: str, color: str):
+        self.row = row
+        self.col = col
+        self.color = color
+        self.symbol = symbol if color == "white" else symbol.lower()
+        self.moved = False
+
+    def pos(self) -> Position:
+        return (self.row, self.col)
+
+    def set_pos(self, r: int, c: int):
+        self.row, self.col = r, c
+
+    def is_enemy(self, board_array: List[List[str]], r: int, c: int) -> bool:
+        ch = board_array[r-1][c-1]
+        if ch == " ":
+            return False
+        return ch.islower() if self.color == "white" else ch.isupper()
+
+    def gen_moves(self, game: "Game") -> List[Position]:
+        raise NotImplementedError
+
+class SlidingPiece(Piece):
+    __slots__ = ()
+    directions: List[Tuple[int, int]] = []
+    rays: List[tuple] = []
+
+    def gen_moves(self, game: "Game") -> List[Position]:
+        arr = game.board.return_array()
+        is_enemy = str.islower if self.color == "white" else str.isupper
+        moves: List[Position] = []
+        for ray in self.rays[(self.row - 1) * 8 + self.col - 1]:
+            for pos, ri, ci in ray:
+                cell = arr[ri][ci]
+                if cell == " ":
+                    moves.append(pos)
+                else:
+                    if is_enemy(cell):
+                        moves.append(pos)
+                    break
+        return moves
+
+class Rook(SlidingPiece):
+    directions = ROOK_DIRS
+    rays = ray_table(directions)
+    __slots__ = ()
+    def __init__(self, r, c, color):
+        super().__init__(r, c, "R", color)
+
+class Bishop(SlidingPiece):
+    directions = BISHOP_DIRS
+    rays = ray_table(directions)
+    __slots__ = ()
+    def __init__(self, r, c, color):
+        super().__init__(r, c, "B", color)
+
+class Queen(SlidingPiece):
+    directions = ROOK_DIRS + BISHOP_DIRS
+    rays = ray_table(directions)
+    __slots__ = ()
+    def __init__(self, r, c, color):
+        super().__init__(r, c, "Q", color)
+
+class Knight(Piece):
+    DELTAS = [(2,1),(2,-1),(-2,1),(-2,-1),(1,2),(1,-2),(-1,2),(-1,-2)]
+    TARGETS = target_table(DELTAS)
+    __slots__ = ()
+    def __init__(self, r, c, color):
+        super().__init__(r, c, "N", color)
+    def gen_moves(self, game: "Game") -> List[Position]:
+        arr = game.board.return_array()
+        is_enemy = str.islower if self.color == "white" else str.isupper
+        moves: List[Position] = []
+        for pos, ri, ci in self.TARGETS[(self.row - 1) * 8 + self.col - 1]:
+            ch = arr[ri][ci]
+            if ch == " " or is_enemy(ch):
+                moves.append(pos)
+        return moves
+
+class King(Piece):
+    DELTAS = [(-1,-1),(-1,0),(-1,1),(0,-1),(0,1),(1,-1),(1,0),(1,1)]
+    TARGETS = target_table(DELTAS)
+    __slots__ = ()
+    def __init__(self, r, c, color):
+        super().__init__(r, c, "K", color)
+    def gen_moves(self, game: "Game") -> List[Position]:
+        arr = game.board.return_array()
+        is_enemy = str.islower if self.color == "white" else str.isupper
+        moves: List[Position] = []
+        for pos, ri, ci in self.TARGETS[(self.row - 1) * 8 + self.col - 1]:
+            ch = arr[ri][ci]
+            if ch == " " or is_enemy(ch):
+                moves.append(pos)
+        if not self.moved and not game.in_check(self.color):
+            row = 1 if self.color == "white" else 8
+            if game.can_castle(self.color, king_side=True):
+                moves.append((row, 7))
+            if game.can_castle(self.color, king_side=False):
+                moves.append((row, 3))
+        return moves
+
+class Pawn(Piece):
+    __slots__ = ()
+    def __init__(self, r, c, color):
+        super().__init__(r, c, "P", color)
+    
+    def gen_moves(self, game: "Game") -> List[Position]:
+        arr = game.board.return_array()
+        moves: List[Position] = []
+        dir = 1 if self.color == "white" else -1
+        start_row = 2 if self.color == "white" else 7
+        
+        # Forward one square
+        r1, c1 = self.row + dir, self.col
+        if in_bounds(r1, c1) and arr[r1-1][c1-1] == " ":
+            moves.append((r1, c1))
+            
+            # Forward two squares (only if pawn hasn't moved and path is clear)
+            if not self.moved and self.row == start_row:
+                r2 = self.row + 2*dir
+                if in_bounds(r2, c1) and arr[r2-1][c1-1] == " ":
+                    moves.append((r2, c1))
+        
+        # Diagonal captures (including en passant)
+        is_enemy = str.islower if self.color == "white" else str.isupper
+        for pos, ri, ci in PAWN_CAPTURES[self.color][(self.row - 1) * 8 + self.col - 1]:
+            if is_enemy(arr[ri][ci]) or game.en_passant_target == pos:
+                moves.append(pos)
+        
+        return moves
+
+# --- SQUARE INDICES ---
+# Squares are indexed 0..63 from a1 (0) to h8 (63): index = (row-1)*8 + (col-1).
+def square_index(pos: Position) -> int:
+    r, c = pos
+    return (r - 1) * 8 + (c - 1)
+
+# --- BITBOARDS ---
+# Optional position core for Game(use_bitboards=True): one integer per piece symbol plus
+# occupancy masks, bit n standing for square n. Attack tests, checks and pins and the
+# destinations of every piece are then worked out with mask arithmetic.
+ALL_SQUARES = (1 << 64) - 1
+
+def _entries_mask(entries) -> int:
+    """The mask of a lookup-table entry list of ((r, c), r-1, c-1) tuples."""
+    mask = 0
+    for _, ri, ci in entries:
+        mask |= 1 << (ri * 8 + ci)
+    return mask
+
+KNIGHT_MASKS = [_entries_mask(entries) for entries in Knight.TARGETS]
+KING_MASKS = [_entries_mask(entries) for entries in King.TARGETS]
+PAWN_ATTACK_MASKS = {color: [_entries_mask(entries) for entries in table] for color, table in PAWN_CAPTURES.items()}
+RAY_MASKS = {d: [_entries_mask(ray) for ray in RAYS[d]] for d in ROOK_DIRS + BISHOP_DIRS}
+
+def _slider_rays(directions) -> List[tuple]:
+    """Per square, (ray mask, masks of the rays from each square, walks upwards) for each non-empty ray.
+
+    A ray that walks towards higher square indices meets its first piece in its lowest set bit.
+    """
+    return [tuple((RAY_MASKS[d][sq], RAY_MASKS[d], d[0] * 8 + d[1] > 0) for d in directions if RAY_MASKS[d][sq])
+            for sq in range(64)]
+
+ROOK_RAYS = _slider_rays(ROOK_DIRS)
+BISHOP_RAYS = _slider_rays(BISHOP_DIRS)
+# Every square a rook or bishop on the square could reach on an empty board (the rays are disjoint)
+ROOK_REACH = [sum(ray for ray, _, _ in rays) for rays in ROOK_RAYS]
+BISHOP_REACH = [sum(ray for ray, _, _ in rays) for rays in BISHOP_RAYS]
+
+class Bitboards:
+    """The position as one integer per piece symbol, plus each side's and all occupied squares."""
+    __slots__ = ("boards", "occupied", "all")
+
+    def __init__(self):
+        self.boards: Dict[str, int] = {s: 0 for s in "PNBRQKpnbrqk"}
+        self.occupied: Dict[str, int] = {"white": 0, "black": 0}
+        self.all = 0
+
+    def set(self, sq: int, symbol: str):
+        bit = 1 << sq
+        self.boards[symbol] |= bit
+        self.occupied["white" if symbol.isupper() else "black"] |= bit
+        self.all |= bit
+
+    def clear(self, sq: int, symbol: str):
+        bit = ALL_SQUARES ^ (1 << sq)
+        self.boards[symbol] &= bit
+        self.occupied["white" if symbol.isupper() else "black"] &= bit
+        self.all &= bit
+
+    @staticmethod
+    def first_blocker(blockers: int, upwards: bool) -> int:
+        """The bit of the piece nearest the ray's start among blockers."""
+        return blockers & -blockers if upwards else 1 << (blockers.bit_length() - 1)
+
+    def slider_attacks(self, sq: int, rays, occ: int) -> int:
+        attacks = 0
+        for ray, ray_from, upwards in rays:
+            blockers = ray & occ
+            if blockers:
+                ray ^= ray_from[self.first_blocker(blockers, upwards).bit_length() - 1]
+            attacks |= ray
+        return attacks
+
+    def is_attacked(self, sq: int, by_color: str, occ: int) -> bool:
+        """Whether by_color attacks sq, with occ as the occupied squares."""
+        b = self.boards
+        if by_color == "white":
+            # A white pawn attacks sq exactly when a black pawn on sq would attack the pawn's square
+            if (PAWN_ATTACK_MASKS["black"][sq] & b["P"] or KNIGHT_MASKS[sq] & b["N"]
+                    or KING_MASKS[sq] & b["K"]):
+                return True
+            straight, diagonal = b["R"] | b["Q"], b["B"] | b["Q"]
+        else:
+            if (PAWN_ATTACK_MASKS["white"][sq] & b["p"] or KNIGHT_MASKS[sq] & b["n"]
+                    or KING_MASKS[sq] & b["k"]):
+                return True
+            straight, diagonal = b["r"] | b["q"], b["b"] | b["q"]
+        for rays, sliders, reach in ((ROOK_RAYS, straight, ROOK_REACH), (BISHOP_RAYS, diagonal, BISHOP_REACH)):
+            if not reach[sq] & sliders:
+                continue
+            for ray, _, upwards in rays[sq]:
+                blockers = ray & occ
+                if blockers and self.first_blocker(blockers, upwards) & sliders:
+                    return True
+        return False
+
+    def pseudo_moves(self, sq: int, p: Piece, en_passant_target: Optional[Position]) -> int:
+        """The destination mask of the piece on sq, without castling."""
+        own = self.occupied[p.color]
+        if isinstance(p, Pawn):
+            enemy = self.occupied["black" if p.color == "white" else "white"]
+            step, start_rank = (8, 1) if p.color == "white" else (-8, 6)
+            moves = 0
+            one = sq + step
+            if 0 <= one < 64 and not self.all >> one & 1:
+                moves = 1 << one
+                if not p.moved and sq >> 3 == start_rank and not self.all >> (one + step) & 1:
+                    moves |= 1 << (one + step)
+            if en_passant_target is not None:
+                enemy |= 1 << square_index(en_passant_target)
+            return moves | PAWN_ATTACK_MASKS[p.color][sq] & enemy
+        if isinstance(p, Knight):
+            return KNIGHT_MASKS[sq] & ~own
+        if isinstance(p, King):
+            return KING_MASKS[sq] & ~own
+        if isinstance(p, Rook):
+            attacks = self.slider_attacks(sq, ROOK_RAYS[sq], self.all)
+        elif isinstance(p, Bishop):
+            attacks = self.slider_attacks(sq, BISHOP_RAYS[sq], self.all)
+        else:
+            attacks = self.slider_attacks(sq, ROOK_RAYS[sq] + BISHOP_RAYS[sq], self.all)
+        return attacks & ~own
+
+# --- ZOBRIST HASHING ---
+# A fixed seed keeps keys identical across runs and processes
+_zobrist_rng = random.Random(0x5EED)
+ZOBRIST_PIECES = {symbol: [_zobrist_rng.getrandbits(64) for _ in range(64)] for symbol in "PNBRQKpnbrqk"}
+# Indexed by the castling-rights mask: 1 = white king side, 2 = white queen side, 4 = black king side, 8 = black queen side
+# (no rights hashes to 0, so a fresh key needs no castling term)
+ZOBRIST_CASTLING = [0] + [_zobrist_rng.getrandbits(64) for _ in range(15)]
+ZOBRIST_EN_PASSANT = [_zobrist_rng.getrandbits(64) for _ in range(9)]  # by file 1-8
+ZOBRIST_BLACK_TO_MOVE = _zobrist_rng.getrandbits(64)
+CASTLING_SQUARES = [(1, (1,5), (1,8), "white"), (2, (1,5), (1,1), "white"),
+                    (4, (8,5), (8,8), "black"), (8, (8,5), (8,1), "black")]
+
+# --- EVALUATION TABLES ---
+PIECE_VALUES = {"P": 1, "N": 3, "B": 3, "R": 5, "Q": 9, "K": 0}
+
+# Piece-square bonuses in centipawns from White's side, rank 8 first (Michniewski's simplified evaluation)
+PST_TABLES = {
+    "P": [[  0,  0,  0,  0,  0,  0,  0,  0],
+          [ 50, 50, 50, 50, 50, 50, 50, 50],
+          [ 10, 10, 20, 30, 30, 20, 10, 10],
+          [  5,  5, 10, 25, 25, 10,  5,  5],
+          [  0,  0,  0, 20, 20,  0,  0,  0],
+          [  5, -5,-10,  0,  0,-10, -5,  5],
+          [  5, 10, 10,-20,-20, 10, 10,  5],
+          [  0,  0,  0,  0,  0,  0,  0,  0]],
+    "N": [[-50,-40,-30,-30,-30,-30,-40,-50],
+          [-40,-20,  0,  0,  0,  0,-20,-40],
+          [-30,  0, 10, 15, 15, 10,  0,-30],
+          [-30,  5, 15, 20, 20, 15,  5,-30],
+          [-30,  0, 15, 20, 20, 15,  0,-30],
+          [-30,  5, 10, 15, 15, 10,  5,-30],
+          [-40,-20,  0,  5,  5,  0,-20,-40],
+          [-50,-40,-30,-30,-30,-30,-40,-50]],
+    "B": [[-20,-10,-10,-10,-10,-10,-10,-20],
+          [-10,  0,  0,  0,  0,  0,  0,-10],
+          [-10,  0,  5, 10, 10,  5,  0,-10],
+          [-10,  5,  5, 10, 10,  5,  5,-10],
+          [-10,  0, 10, 10, 10, 10,  0,-10],
+          [-10, 10, 10, 10, 10, 10, 10,-10],
+          [-10,  5,  0,  0,  0,  0,  5,-10],
+          [-20,-10,-10,-10,-10,-10,-10,-20]],
+    "R": [[  0,  0,  0,  0,  0,  0,  0,  0],
+          [  5, 10, 10, 10, 10, 10, 10,  5],
+          [ -5,  0,  0,  0,  0,  0,  0, -5],
+          [ -5,  0,  0,  0,  0,  0,  0, -5],
+          [ -5,  0,  0,  0,  0,  0,  0, -5],
+          [ -5,  0,  0,  0,  0,  0,  0, -5],
+          [ -5,  0,  0,  0,  0,  0,  0, -5],
+          [  0,  0,  0,  5,  5,  0,  0,  0]],
+    "Q": [[-20,-10,-10, -5, -5,-10,-10,-20],
+          [-10,  0,  0,  0,  0,  0,  0,-10],
+          [-10,  0,  5,  5,  5,  5,  0,-10],
+          [ -5,  0,  5,  5,  5,  5,  0, -5],
+          [  0,  0,  5,  5,  5,  5,  0, -5],
+          [-10,  5,  5,  5,  5,  5,  0,-10],
+          [-10,  0,  5,  0,  0,  0,  0,-10],
+          [-20,-10,-10, -5, -5,-10,-10,-20]],
+    "K": [[-30,-40,-40,-50,-50,-40,-40,-30],
+          [-30,-40,-40,-50,-50,-40,-40,-30],
+          [-30,-40,-40,-50,-50,-40,-40,-30],
+          [-30,-40,-40,-50,-50,-40,-40,-30],
+          [-20,-30,-30,-40,-40,-30,-30,-20],
+          [-10,-20,-20,-20,-20,-20,-20,-10],
+          [ 20, 20,  0,  0,  0,  0, 20, 20],
+          [ 20, 30, 10,  0,  0, 10, 30, 20]],
+}
+# Flat per-symbol lookup by square index; Black reads the tables mirrored top to bottom
+PST = {}
+for _kind, _table in PST_TABLES.items():
+    PST[_kind] = [_table[8 - (sq // 8 + 1)][sq % 8] for sq in range(64)]
+    PST[_kind.lower()] = [_table[sq // 8][sq % 8] for sq in range(64)]
+
+# --- TRANSPOSITION TABLE ---
+EXACT, LOWER_BOUND, UPPER_BOUND = 0, 1, 2
+
+class TranspositionTable:
+    """Fixed-size table of search results keyed by Zobrist key.
+
+    Each bucket has a depth-preferred slot, replaced only by deeper searches or entries
+    left over from an earlier search, and an always-replace slot for everything else.
+    """
+    # Approximate CPython footprint of one stored entry tuple and its list slot
+    ENTRY_BYTES = 200
+
+    def __init__(self, size_mb: float = 16):
+        self.size_mb = size_mb
+        self.num_buckets = max(1, int(size_mb * 1024 * 1024) // (2 * self.ENTRY_BYTES))
+        self.clear()
+
+    def clear(self):
+        self.deep: List[Optional[tuple]] = [None] * self.num_buckets
+        self.recent: List[Optional[tuple]] = [None] * self.num_buckets
+        self.age = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    def new_search(self):
+        """Marks existing entries as old so the depth-preferred slots can be reused."""
+        self.age += 1
+
+    def probe(self, key: int) -> Optional[tuple]:
+        """Returns (key, depth, score, bound, best_move, age) for key, or None."""
+        i = key % self.num_buckets
+        entry = self.deep[i]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        entry = self.recent[i]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        return None
+
+    def store(self, key: int, depth: int, score: float, bound: int, best_move: Optional[tuple]):
+        i = key % self.num_buckets
+        entry = (key, depth, score, bound, best_move, self.age)
+        deep = self.deep[i]
+        if deep is None or deep[0] == key or depth >= deep[1] or deep[5] != self.age:
+            self.deep[i] = entry
+        else:
+            self.recent[i] = entry
+        self.stores += 1
+
+    def stats(self) -> Dict[str, float]:
+        probes = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "hit_rate": self.hits / probes if probes else 0.0,
+        }
+
+MAX_PLY = 64
+NO_KILLERS = (None, None)
+# Captures that cannot lift the score to within this many points of alpha are skipped in quiescence
+DELTA_MARGIN = 2
+
+class SearchTimeout(Exception):
+    """Raised inside the search when its deadline has passed."""
+
+# --- FEN ---
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+FEN_PIECE_CLASSES = {"p": Pawn, "n": Knight, "b": Bishop, "r": Rook, "q": Queen, "k": King}
+CASTLING_LETTERS = {1: "K", 2: "Q", 4: "k", 8: "q"}
+
+# --- PACKED MOVES ---
+# The search passes moves around as 16-bit integers: from-square in bits 0-5, to-square in
+# bits 6-11 and a 4-bit flag in bits 12-15. Move lists live in one array('H') per ply.
+FLAG_QUIET = 0
+FLAG_DOUBLE_PUSH = 1
+FLAG_KING_CASTLE = 2
+FLAG_QUEEN_CASTLE = 3
+FLAG_CAPTURE = 4
+FLAG_EN_PASSANT = 5
+FLAG_PROMOTION = 8  # plus the index in PROMOTION_PIECES, plus FLAG_CAPTURE when it captures
+PROMOTION_PIECES = "NBRQ"
+SQUARE_POSITIONS = [(sq // 8 + 1, sq % 8 + 1) for sq in range(64)]
+MOVE_BUFFER_SIZE = 256  # more than the 218 moves of the richest known position
+
+def pack_move(src: Position, dest: Position, flag: int = FLAG_QUIET) -> int:
+    return (src[0] - 1) * 8 + src[1] - 1 | ((dest[0] - 1) * 8 + dest[1] - 1) << 6 | flag << 12
+
+def unpack_move(move: int) -> tuple:
+    """Returns (src, dest), or (src, dest, promotion symbol) for a promotion."""
+    src, dest, flag = SQUARE_POSITIONS[move & 63], SQUARE_POSITIONS[move >> 6 & 63], move >> 12
+    if flag & FLAG_PROMOTION:
+        return src, dest, PROMOTION_PIECES[flag & 3]
+    return src, dest
+
+# --- GAME ENGINE CLASS ---
+class Game:
+    def __init__(self, use_bitboards: bool = False, tt_size_mb: float = 16, fen: Optional[str] = None):
+        self._init_empty(tt_size_mb, use_bitboards)
+        if fen is None:
+            self._setup_startpos()
+        else:
+            self._load_fen(fen)
+        self._update_castling_key()
+
+    def _init_empty(self, tt_size_mb: float, use_bitboards: bool = False):
+        """Sets up an empty board with default settings; __init__ and copy() place the pieces."""
+        self.board = Board()
+        self.arr = self.board.return_array()
+        # Optional bitboard core; when set, attack tests and legal move generation run on it
+        self.bitboards: Optional[Bitboards] = Bitboards() if use_bitboards else None
+        # Check and pin info for the position whose Zobrist key is _position_cache_key; see _position_info
+        self._position_cache: Dict[tuple, object] = {}
+        self._position_cache_key = 0
+        self.to_move = "white"
+        self.pieces: Dict[Position, Piece] = {}
+        self.kings: Dict[str, King] = {}
+        self.en_passant_target: Optional[Position] = None
+        self.halfmove_clock = 0
+        self.move_number = 1
+        self.captured_pieces = {"white": [], "black": []}
+        # Running totals kept by every board change, so evaluation and the sidebar never rescan
+        self.material = {"white": 0, "black": 0}
+        self.pst_score = {"white": 0, "black": 0}
+        self.captured_value = {"white": 0, "black": 0}
+        # Undo records for push()/pop(), newest last. make_move pushes too, so this holds every move
+        # of the game (pgn.game_to_pgn reads the move list from it); only reset_game clears it.
+        self._undo_stack: List[tuple] = []
+        # Zobrist key of the position, maintained by every board change
+        self.zobrist_key = 0
+        self._castling_rights = 0
+        # Search results shared by every ai_move call, created on first use
+        self.tt_size_mb = tt_size_mb
+        self.tt: Optional[TranspositionTable] = None
+        # Deadline (perf_counter seconds) of the running search, and what its last finished depth found
+        self._deadline: Optional[float] = None
+        self._stop_requested = False
+        self.nodes = 0
+        self.search_info: Dict[str, object] = {}
+        # Move ordering: two killer moves per ply and a history score per from-to pair (move & 0xFFF).
+        # The killer table is created by the first search.
+        self.move_ordering = True
+        self.killers: List[List[Optional[int]]] = []
+        self.history: Dict[int, int] = {}
+        # Packed-move list and move-ordering scores per search ply, each created the first time a
+        # search reaches that ply
+        self._move_buffers: List[array] = []
+        self._score_buffers: List[array] = []
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        # Leaves are resolved with a capture-only search instead of a static evaluation
+        self.use_quiescence = True
+        # Piece-square bonuses on top of material in evaluate_board
+        self.use_pst = True
+        # Opening book (opening_book.OpeningBook) consulted before searching, if set
+        self.book = None
+
+    @classmethod
+    def from_fen(cls, fen: str, **kwargs) -> "Game":
+        """Builds a game from a FEN string. Extra keyword arguments go to Game()."""
+        return cls(fen=fen, **kwargs)
+    
+    def reset_game(self):
+        self.board = Board()
+        self.arr = self.board.return_array()
+        self.to_move = "white"
+        self.pieces = {}
+        self.kings = {}
+        self.en_passant_target = None
+        self.halfmove_clock = 0
+        self.move_number = 1
+        self.captured_pieces = {"white": [], "black": []}
+        self.material = {"white": 0, "black": 0}
+        self.pst_score = {"white": 0, "black": 0}
+        self.captured_value = {"white": 0, "black": 0}
+        self._undo_stack = []
+        self._position_cache = {}
+        self._position_cache_key = 0
+        self.zobrist_key = 0
+        self._castling_rights = 0
+        if self.bitboards is not None:
+            self.bitboards = Bitboards()
+        self._setup_startpos()
+        self._update_castling_key()
+
+    def _place(self, p: Piece):
+        self.pieces[p.pos()] = p
+        r, c = p.pos()
+        self.board.Put_piece(r, c, p.symbol)
+        sq = square_index((r, c))
+        self.zobrist_key ^= ZOBRIST_PIECES[p.symbol][sq]
+        self.material[p.color] += PIECE_VALUES[p.symbol.upper()]
+        self.pst_score[p.color] += PST[p.symbol][sq]
+        if self.bitboards is not None:
+            self.bitboards.set(sq, p.symbol)
+        if isinstance(p, King):
+            self.kings[p.color] = p
+
+    def copy(self) -> "Game":
+        """Returns an independent copy of the position, without search tables or undo history."""
+        other = Game.__new__(Game)
+        other._init_empty(self.tt_size_mb, self.bitboards is not None)
+        for p in self.pieces.values():
+            clone = type(p)(p.row, p.col, p.color)
+            clone.moved = p.moved
+            other._place(clone)
+        other.to_move = self.to_move
+        other.en_passant_target = self.en_passant_target
+        other.halfmove_clock = self.halfmove_clock
+        other.move_number = self.move_number
+        other.captured_pieces = {color: list(pieces) for color, pieces in self.captured_pieces.items()}
+        other.captured_value = dict(self.captured_value)
+        other._castling_rights = self._castling_rights
+        other.zobrist_key = self.zobrist_key
+        other.book = self.book
+        other.use_quiescence = self.use_quiescence
+        other.use_pst = self.use_pst
+        other.move_ordering = self.move_ordering
+        return other
+
+    def _load_fen(self, fen: str):
+        """Places the pieces and sets the state of a FEN string on an empty game."""
+        fields = fen.split()
+        if len(fields) < 4:
+            raise ValueError("FEN needs at least 4 fields: " + fen)
+        rows = fields[0].split("/")
+        if len(rows) != 8:
+            raise ValueError("FEN board needs 8 ranks: " + fields[0])
+        for i, row in enumerate(rows):
+            r, c = 8 - i, 1
+            for ch in row:
+                if ch.isdigit():
+                    c += int(ch)
+                    continue
+                cls = FEN_PIECE_CLASSES.get(ch.lower())
+                if cls is None or c > 8:
+                    raise ValueError("Bad FEN rank: " + row)
+                color = "white" if ch.isupper() else "black"
+                p = cls(r, c, color)
+                # Only pawns on their home rank may still double-push; kings and rooks
+                # get their flags from the castling field below
+                p.moved = not (cls is Pawn and r == (2 if color == "white" else 7))
+                self._place(p)
+                c += 1
+        if fields[1] not in ("w", "b"):
+            raise ValueError("Bad side to move: " + fields[1])
+        for bit, king_pos, rook_pos, color in CASTLING_SQUARES:
+            if CASTLING_LETTERS[bit] in fields[2]:
+                king, rook = self.pieces.get(king_pos), self.pieces.get(rook_pos)
+                if not isinstance(king, King) or not isinstance(rook, Rook):
+                    raise ValueError("Castling right " + CASTLING_LETTERS[bit] + " without king and rook at home")
+                king.moved = rook.moved = False
+        if fields[1] == "b":
+            self.to_move = "black"
+            self.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+        if fields[3] != "-":
+            self._set_en_passant_target(algebraic_to_pos(fields[3]))
+        if len(fields) >= 6:
+            self.halfmove_clock = int(fields[4])
+            self.move_number = int(fields[5])
+
+    def to_fen(self) -> str:
+        """Returns the position as a FEN string."""
+        rows = []
+        for r in range(8, 0, -1):
+            row, empty = "", 0
+            for ch in self.arr[r - 1]:
+                if ch == " ":
+                    empty += 1
+                    continue
+                if empty:
+                    row += str(empty)
+                    empty = 0
+                row += ch
+            rows.append(row + (str(empty) if empty else ""))
+        rights = self.castling_rights()
+        castling = "".join(letter for bit, letter in CASTLING_LETTERS.items() if rights & bit) or "-"
+        ep = pos_to_algebraic(self.en_passant_target) if self.en_passant_target else "-"
+        return (f"{'/'.join(rows)} {'w' if self.to_move == 'white' else 'b'} {castling} {ep} "
+                f"{self.halfmove_clock} {self.move_number}")
+
+    def _setup_startpos(self):
+        self.pieces.clear()
+        self.kings.clear()
+        # White pieces (rows 1-2)
+        self._place(Rook(1,1,"white"))
+        self._place(Knight(1,2,"white"))
+        self._place(Bishop(1,3,"white"))
+        self._place(Queen(1,4,"white"))
+        self._place(King(1,5,"white"))
+        self._place(Bishop(1,6,"white"))
+        self._place(Knight(1,7,"white"))
+        self._place(Rook(1,8,"white"))
+        for c in range(1,9):
+            self._place(Pawn(2,c,"white"))
+        # Black pieces (rows 7-8)
+        self._place(Rook(8,1,"black"))
+        self._place(Knight(8,2,"black"))
+        self._place(Bishop(8,3,"black"))
+        self._place(Queen(8,4,"black"))
+        self._place(King(8,5,"black"))
+        self._place(Bishop(8,6,"black"))
+        self._place(Knight(8,7,"black"))
+        self._place(Rook(8,8,"black"))
+        for c in range(1,9):
+            self._place(Pawn(7,c,"black"))
+
+    def piece_at(self, pos: Position) -> Optional[Piece]:
+        return self.pieces.get(pos)
+
+    def remove_at(self, pos: Position):
+        p = self.pieces.pop(pos, None)
+        if p is not None:
+            r, c = pos
+            self.board.Put_piece(r, c, " ")
+            sq = square_index(pos)
+            self.zobrist_key ^= ZOBRIST_PIECES[p.symbol][sq]
+            self.material[p.color] -= PIECE_VALUES[p.symbol.upper()]
+            self.pst_score[p.color] -= PST[p.symbol][sq]
+            if self.bitboards is not None:
+                self.bitboards.clear(sq, p.symbol)
+
+    def move_piece_obj(self, p: Piece, dest: Position):
+        self.remove_at(p.pos())
+        if dest in self.pieces:
+            self.remove_at(dest)
+        p.set_pos(*dest)
+        self.pieces[dest] = p
+        r, c = dest
+        self.board.Put_piece(r, c, p.symbol)
+        sq = square_index(dest)
+        self.zobrist_key ^= ZOBRIST_PIECES[p.symbol][sq]
+        self.pst_score[p.color] += PST[p.symbol][sq]
+        self.material[p.color] += PIECE_VALUES[p.symbol.upper()]
+        if self.bitboards is not None:
+            self.bitboards.set(sq, p.symbol)
+        p.moved = True
+
+    def castling_rights(self) -> int:
+        """Returns the castling-rights mask derived from the king and rook moved flags."""
+        rights = 0
+        for bit, king_pos, rook_pos, color in CASTLING_SQUARES:
+            king = self.pieces.get(king_pos)
+            rook = self.pieces.get(rook_pos)
+            if (isinstance(king, King) and king.color == color and not king.moved
+                    and isinstance(rook, Rook) and rook.color == color and not rook.moved):
+                rights |= bit
+        return rights
+
+    def _update_castling_key(self):
+        rights = self.castling_rights()
+        if rights != self._castling_rights:
+            self.zobrist_key ^= ZOBRIST_CASTLING[self._castling_rights] ^ ZOBRIST_CASTLING[rights]
+            self._castling_rights = rights
+
+    def _set_en_passant_target(self, target: Optional[Position]):
+        if self.en_passant_target is not None:
+            self.zobrist_key ^= ZOBRIST_EN_PASSANT[self.en_passant_target[1]]
+        if target is not None:
+            self.zobrist_key ^= ZOBRIST_EN_PASSANT[target[1]]
+        self.en_passant_target = target
+
+    def compute_zobrist_key(self) -> int:
+        """Recomputes the Zobrist key from scratch, for checking the incremental one."""
+        key = ZOBRIST_CASTLING[self.castling_rights()]
+        for pos, p in self.pieces.items():
+            key ^= ZOBRIST_PIECES[p.symbol][square_index(pos)]
+        if self.en_passant_target is not None:
+            key ^= ZOBRIST_EN_PASSANT[self.en_passant_target[1]]
+        if self.to_move == "black":
+            key ^= ZOBRIST_BLACK_TO_MOVE
+        return key
+
+    def color_of(self, ch: str) -> Optional[str]:
+        if ch == " ":
+            return None
+        return "white" if ch.isupper() else "black"
+
+    def _position_info(self) -> Dict[tuple, object]:
+        """The check and pin info cached for the current position.
+
+        The cache is keyed on the Zobrist key, so board changes need not clear it: the first
+        lookup in a new position starts an empty one.
+        """
+        if self._position_cache_key != self.zobrist_key:
+            self._position_cache = {}
+            self._position_cache_key = self.zobrist_key
+        return self._position_cache
+
+    def in_check(self, color: str) -> bool:
+        king = self.kings.get(color)
+        if not king:
+            return False
+        cache = self._position_info()
+        key = ("check", color)
+        checked = cache.get(key)
+        if checked is None:
+            enemy = "black" if color == "white" else "white"
+            checked = self.is_square_attacked(king.pos(), enemy)
+            cache[key] = checked
+        return checked
+
+    def is_square_attacked(self, pos: Position, by_color: str, ignore: Optional[Position] = None) -> bool:
+        """Tests pos from the target outwards: pawn, knight and king offsets, then rays to the first blocker.
+
+        The piece on ignore, if any, is treated as absent so a king cannot hide behind itself.
+        """
+        sq = (pos[0] - 1) * 8 + pos[1] - 1
+        if self.bitboards is not None:
+            occ = self.bitboards.all
+            if ignore is not None:
+                occ &= ~(1 << (ignore[0] - 1) * 8 + ignore[1] - 1)
+            return self.bitboards.is_attacked(sq, by_color, occ)
+        arr = self.arr
+        if by_color == "white":
+            pawn, knight, king, straight, diagonal = "P", "N", "K", "RQ", "BQ"
+        else:
+            pawn, knight, king, straight, diagonal = "p", "n", "k", "rq", "bq"
+        for _, ri, ci in PAWN_ATTACKERS[by_color][sq]:
+            if arr[ri][ci] == pawn:
+                return True
+        for _, ri, ci in Knight.TARGETS[sq]:
+            if arr[ri][ci] == knight:
+                return True
+        for _, ri, ci in King.TARGETS[sq]:
+            if arr[ri][ci] == king:
+                return True
+        for directions, sliders in ((ROOK_DIRS, straight), (BISHOP_DIRS, diagonal)):
+            for d in directions:
+                for target, ri, ci in RAYS[d][sq]:
+                    cell = arr[ri][ci]
+                    if cell != " " and target != ignore:
+                        if cell in sliders:
+                            return True
+                        break
+        return False
+
+    def can_castle(self, color: str, king_side: bool) -> bool:
+        king = self.kings[color]
+        if king.moved:
+            return False
+        row = 1 if color == "white" else 8
+        if king_side:
+            rook_pos = (row, 8)
+            path = [(row,6), (row,7)]
+        else:
+            rook_pos = (row, 1)
+            path = [(row,4), (row,3), (row,2)]
+        rook = self.piece_at(rook_pos)
+        if not isinstance(rook, Rook) or rook.color != color or rook.moved:
+            return False
+        for r, c in path:
+            if self.arr[r-1][c-1] != " ":
+                return False
+        enemy = "black" if color == "white" else "white"
+        check_squares = [(row,5), (row,6 if king_side else 4), (row,7 if king_side else 3)]
+        for sq in check_squares:
+            if self.is_square_attacked(sq, enemy):
+                return False
+        return True
+
+    def perform_castle(self, color: str, king_side: bool):
+        row = 1 if color == "white" else 8
+        king = self.kings[color]
+        if king_side:
+            self.move_piece_obj(king, (row,7))
+            rook = self.piece_at((row,8))
+            self.move_piece_obj(rook, (row,6))
+        else:
+            self.move_piece_obj(king, (row,3))
+            rook = self.piece_at((row,1))
+            self.move_piece_obj(rook, (row,4))
+
+    def _checks_and_pins(self, color: str) -> tuple:
+        """Returns (number of checkers, squares that stop a single check, pin ray per pinned square).
+
+        Computed once per position by walking the eight rays and the knight/pawn offsets from the king.
+        """
+        cache = self._position_info()
+        key = ("pins", color)
+        info = cache.get(key)
+        if info is not None:
+            return info
+        checkers = 0
+        block: Optional[set] = None
+        pins: Dict[Position, set] = {}
+        king = self.kings.get(color)
+        if king is None:
+            info = (0, None, pins)
+            cache[key] = info
+            return info
+        arr = self.arr
+        ksq = (king.row - 1) * 8 + king.col - 1
+        if color == "white":
+            is_enemy = str.islower
+            knight, pawn, straight, diagonal = "n", "p", "rq", "bq"
+        else:
+            is_enemy = str.isupper
+            knight, pawn, straight, diagonal = "N", "P", "RQ", "BQ"
+        for directions, sliders in ((ROOK_DIRS, straight), (BISHOP_DIRS, diagonal)):
+            for d in directions:
+                ray = []
+                pinned = None
+                for target, ri, ci in RAYS[d][ksq]:
+                    ray.append(target)
+                    cell = arr[ri][ci]
+                    if cell != " ":
+                        if is_enemy(cell):
+                            if cell in sliders:
+                                if pinned is None:
+                                    checkers += 1
+                                    block = set(ray)
+                                else:
+                                    pins[pinned] = set(ray)
+                            break
+                        if pinned is not None:
+                            break
+                        pinned = target
+        for target, ri, ci in Knight.TARGETS[ksq]:
+            if arr[ri][ci] == knight:
+                checkers += 1
+                block = {target}
+        for target, ri, ci in PAWN_ATTACKERS["black" if color == "white" else "white"][ksq]:
+            if arr[ri][ci] == pawn:
+                checkers += 1
+                block = {target}
+        info = (checkers, block, pins)
+        cache[key] = info
+        return info
+
+    def _bitboard_checks_and_pins(self, color: str) -> tuple:
+        """_checks_and_pins on the bitboards: (number of checkers, mask that stops a single check,
+        pin mask per pinned square). With no check the mask is ALL_SQUARES."""
+        cache = self._position_info()
+        key = ("bitboard pins", color)
+        info = cache.get(key)
+        if info is not None:
+            return info
+        checkers = 0
+        block = ALL_SQUARES
+        pins: Dict[int, int] = {}
+        king = self.kings.get(color)
+        if king is None:
+            info = (0, block, pins)
+            cache[key] = info
+            return info
+        bb = self.bitboards
+        b, occ, own = bb.boards, bb.all, bb.occupied[color]
+        ksq = (king.row - 1) * 8 + king.col - 1
+        if color == "white":
+            knights, pawns, straight, diagonal = b["n"], b["p"], b["r"] | b["q"], b["b"] | b["q"]
+        else:
+            knights, pawns, straight, diagonal = b["N"], b["P"], b["R"] | b["Q"], b["B"] | b["Q"]
+        for rays, sliders, reach in ((ROOK_RAYS, straight, ROOK_REACH), (BISHOP_RAYS, diagonal, BISHOP_REACH)):
+            if not reach[ksq] & sliders:
+                continue
+            for ray, ray_from, upwards in rays[ksq]:
+                blockers = ray & occ
+                if not blockers:
+                    continue
+                first = bb.first_blocker(blockers, upwards)
+                if first & sliders:
+                    checkers += 1
+                    block = ray ^ ray_from[first.bit_length() - 1]
+                elif first & own and blockers ^ first:
+                    second = bb.first_blocker(blockers ^ first, upwards)
+                    if second & sliders:
+                        pins[first.bit_length() - 1] = ray ^ ray_from[second.bit_length() - 1]
+        for attackers in (KNIGHT_MASKS[ksq] & knights, PAWN_ATTACK_MASKS[color][ksq] & pawns):
+            if attackers:
+                checkers += bin(attackers).count("1")
+                block = attackers
+        info = (checkers, block, pins)
+        cache[key] = info
+        return info
+
+    def _bitboard_legal_moves(self, p: Piece, captures_only: bool = False) -> List[Position]:
+        """legal_moves_for on the bitboards."""
+        bb = self.bitboards
+        sq = (p.row - 1) * 8 + p.col - 1
+        enemy = "black" if p.color == "white" else "white"
+        moves: List[Position] = []
+        if isinstance(p, King):
+            targets = KING_MASKS[sq] & ~bb.occupied[p.color]
+            if captures_only:
+                targets &= bb.occupied[enemy]
+            occ = bb.all ^ (1 << sq)
+            while targets:
+                bit = targets & -targets
+                target = bit.bit_length() - 1
+                if not bb.is_attacked(target, enemy, occ):
+                    moves.append(SQUARE_POSITIONS[target])
+                targets ^= bit
+            if not captures_only and not p.moved and not self.in_check(p.color):
+                row = 1 if p.color == "white" else 8
+                if self.can_castle(p.color, king_side=True):
+                    moves.append((row, 7))
+                if self.can_castle(p.color, king_side=False):
+                    moves.append((row, 3))
+            return moves
+        checkers, block, pins = self._bitboard_checks_and_pins(p.color)
+        if checkers > 1:
+            return moves
+        en_passant_target = self.en_passant_target
+        targets = bb.pseudo_moves(sq, p, en_passant_target)
+        en_passant = 0
+        if en_passant_target is not None and isinstance(p, Pawn):
+            en_passant = targets & 1 << square_index(en_passant_target)
+            targets ^= en_passant
+        if captures_only:
+            targets &= bb.occupied[enemy]
+        targets &= block & pins.get(sq, ALL_SQUARES)
+        while targets:
+            bit = targets & -targets
+            moves.append(SQUARE_POSITIONS[bit.bit_length() - 1])
+            targets ^= bit
+        if en_passant:
+            # En passant empties two squares on one rank, so it is verified by playing it
+            self.push((p.pos(), en_passant_target))
+            if not self.in_check(p.color):
+                moves.append(en_passant_target)
+            self.pop()
+        return moves
+
+    def _legal_king_moves(self, king: King, captures_only: bool = False) -> List[Position]:
+        arr = self.arr
+        enemy = "black" if king.color == "white" else "white"
+        src = king.pos()
+        moves: List[Position] = []
+        is_enemy = str.islower if king.color == "white" else str.isupper
+        for target, ri, ci in King.TARGETS[(king.row - 1) * 8 + king.col - 1]:
+            ch = arr[ri][ci]
+            if captures_only and ch == " ":
+                continue
+            if (ch == " " or is_enemy(ch)) and not self.is_square_attacked(target, enemy, ignore=src):
+                moves.append(target)
+        if not captures_only and not king.moved and not self.in_check(king.color):
+            row = 1 if king.color == "white" else 8
+            if self.can_castle(king.color, king_side=True):
+                moves.append((row, 7))
+            if self.can_castle(king.color, king_side=False):
+                moves.append((row, 3))
+        return moves
+
+    def legal_moves_for(self, p: Piece, captures_only: bool = False) -> List[Position]:
+        """Generates only legal moves, using the position's checks and pins instead of trying each move."""
+        if self.bitboards is not None:
+            return self._bitboard_legal_moves(p, captures_only)
+        if isinstance(p, King):
+            return self._legal_king_moves(p, captures_only)
+        checkers, block, pins = self._checks_and_pins(p.color)
+        if checkers > 1:
+            return []
+        pin = pins.get(p.pos())
+        legal: List[Position] = []
+        src = p.pos()
+        arr = self.arr
+        for dest in p.gen_moves(self):
+            if arr[dest[0]-1][dest[1]-1] == " ":
+                is_en_passant = isinstance(p, Pawn) and dest == self.en_passant_target
+                if captures_only and not is_en_passant:
+                    continue
+            else:
+                is_en_passant = False
+            if is_en_passant:
+                # En passant empties two squares on one rank, so it is verified by playing it
+                self.push((src, dest))
+                if not self.in_check(p.color):
+                    legal.append(dest)
+                self.pop()
+            elif (pin is None or dest in pin) and (block is None or dest in block):
+                legal.append(dest)
+        return legal
+
+    def get_all_legal_moves(self, color: str, captures_only: bool = False) -> List[Tuple[Position, Position]]:
+        moves = []
+        # Iterate over a copy of the dictionary to avoid "dictionary keys changed during iteration" error
+        for pos, p in list(self.pieces.items()):
+            if p.color == color:
+                legal_dests = self.legal_moves_for(p, captures_only)
+                for dest in legal_dests:
+                    moves.append((pos, dest))
+        return moves
+
+    def fill_packed_moves(self, buffer: array, color: str, captures_only: bool = False) -> int:
+        """Writes color's legal moves into buffer as packed moves and returns how many there are.
+
+        Promotions are generated to a queen only, as the search plays them.
+        """
+        n = 0
+        arr = self.arr
+        for pos, p in list(self.pieces.items()):
+            if p.color != color:
+                continue
+            src = (pos[0] - 1) * 8 + pos[1] - 1
+            pawn, king = isinstance(p, Pawn), isinstance(p, King)
+            for dest in self.legal_moves_for(p, captures_only):
+                flag = FLAG_QUIET if arr[dest[0]-1][dest[1]-1] == " " else FLAG_CAPTURE
+                if pawn:
+                    if dest[0] in (1, 8):
+                        flag |= FLAG_PROMOTION | 3
+                    elif dest[1] != pos[1] and flag == FLAG_QUIET:
+                        flag = FLAG_EN_PASSANT
+                    elif abs(dest[0] - pos[0]) == 2:
+                        flag = FLAG_DOUBLE_PUSH
+                elif king and abs(dest[1] - pos[1]) == 2:
+                    flag = FLAG_KING_CASTLE if dest[1] == 7 else FLAG_QUEEN_CASTLE
+                buffer[n] = src | ((dest[0] - 1) * 8 + dest[1] - 1) << 6 | flag << 12
+                n += 1
+        return n
+
+    def packed_moves(self, color: str) -> List[int]:
+        """Legal moves for color as a list of packed moves, for the root of a search."""
+        buffer = self._move_buffer(0)
+        return buffer[:self.fill_packed_moves(buffer, color)].tolist()
+
+    def _move_buffer(self, ply: int) -> array:
+        return self._ply_buffer(self._move_buffers, ply, "H")
+
+    def _score_buffer(self, ply: int) -> array:
+        return self._ply_buffer(self._score_buffers, ply, "i")
+
+    @staticmethod
+    def _ply_buffer(buffers: List[array], ply: int, typecode: str) -> array:
+        if ply < len(buffers):
+            return buffers[ply]
+        if ply >= MAX_PLY:
+            return array(typecode, [0]) * MOVE_BUFFER_SIZE
+        while len(buffers) <= ply:
+            buffers.append(array(typecode, [0]) * MOVE_BUFFER_SIZE)
+        return buffers[ply]
+
+    def _apply_move_permanent(self, src: Position, dest: Position, promotion_symbol: Optional[str]=None):
+        p = self.piece_at(src)
+        if p is None: return
+
+        captured_piece = self.piece_at(dest)
+        
+        # Handle standard captures
+        if captured_piece:
+            self.captured_pieces[p.color].append(captured_piece)
+            self.captured_value[p.color] += self.piece_value(captured_piece)
+        
+        # Handle castling
+        if isinstance(p, King) and abs(dest[1] - p.col) == 2:
+            king_side = dest[1] > p.col
+            self.perform_castle(p.color, king_side)
+        
+        # Handle en passant
+        elif isinstance(p, Pawn) and self.en_passant_target == dest and self.arr[dest[0]-1][dest[1]-1] == " ":
+            dir = 1 if p.color == "white" else -1
+            captured_en_passant_pawn = self.piece_at((dest[0]-dir, dest[1]))
+            if captured_en_passant_pawn: 
+                self.captured_pieces[p.color].append(captured_en_passant_pawn)
+                self.captured_value[p.color] += self.piece_value(captured_en_passant_pawn)
+                self.remove_at((dest[0]-dir, dest[1]))
+            self.move_piece_obj(p, dest)
+        
+        # Normal move
+        else:
+            self.move_piece_obj(p, dest)
+        
+        # Handle promotion
+        if isinstance(p, Pawn) and ((dest[0] == 8 and p.color == "white") or (dest[0] == 1 and p.color == "black")):
+            self.remove_at(dest)
+            self._promote_piece(p, dest, promotion_symbol)
+            
+        # Set en passant target if a pawn made a double-step move
+        if isinstance(p, Pawn) and abs(dest[0] - src[0]) == 2:
+            mid_row = (dest[0] + src[0]) // 2
+            self._set_en_passant_target((mid_row, dest[1]))
+        else:
+            self._set_en_passant_target(None)
+
+        # Moving a king or rook, or capturing a rook, can remove castling rights
+        self._update_castling_key()
+            
+    def make_move(self, src: Position, dest: Position, promotion_symbol: Optional[str]=None) -> bool:
+        """Plays a move if it is legal and returns whether it was played.
+
+        The move stays on the undo stack, which therefore grows by one record per move for the whole game.
+        """
+        p = self.piece_at(src)
+        if p is None or p.color != self.to_move:
+            return False
+            
+        legal_moves = self.legal_moves_for(p)
+        
+        if dest not in legal_moves:
+            return False
+            
+        # Handle promotion
+        if isinstance(p, Pawn) and ((dest[0] == 8 and p.color == "white") or (dest[0] == 1 and p.color == "black")):
+            if not promotion_symbol:
+                # If no promotion symbol is provided, don't make the move. The GUI will handle this.
+                return False
+            self.push((src, dest, promotion_symbol))
+        else:
+            self.push((src, dest))
+            
+        return True
+
+    def push(self, move):
+        """Plays a (src, dest[, promotion]) or packed move without legality checks and records how to undo it.
+
+        Only the pieces the move touches are recorded, so pop() runs in constant time.
+        Promotions default to a queen when no symbol is given.
+        """
+        if move.__class__ is int:
+            src, dest = SQUARE_POSITIONS[move & 63], SQUARE_POSITIONS[move >> 6 & 63]
+            promotion_symbol = PROMOTION_PIECES[move >> 12 & 3] if move >> 12 & FLAG_PROMOTION else "Q"
+        else:
+            src, dest = move[0], move[1]
+            promotion_symbol = move[2] if len(move) > 2 and move[2] else "Q"
+        p = self.pieces[src]
+        captured = self.pieces.get(dest)
+        rook = None
+        rook_src = None
+        rook_moved = False
+        if isinstance(p, King) and abs(dest[1] - src[1]) == 2:
+            rook_src = (src[0], 8 if dest[1] > src[1] else 1)
+            rook = self.pieces[rook_src]
+            rook_moved = rook.moved
+        elif isinstance(p, Pawn) and dest == self.en_passant_target and captured is None:
+            captured = self.pieces.get((src[0], dest[1]))
+
+        self._undo_stack.append((move, src, dest, p, p.moved, captured, rook, rook_src, rook_moved,
+                                 self.en_passant_target, self.halfmove_clock, self.move_number,
+                                 self._position_info(), self.zobrist_key, self._castling_rights))
+        self._apply_move_permanent(src, dest, promotion_symbol)
+
+        # Update game state
+        if isinstance(p, Pawn) or captured is not None:
+            self.halfmove_clock = 0
+        else:
+            self.halfmove_clock += 1
+
+        self.to_move = "black" if self.to_move == "white" else "white"
+        self.zobrist_key ^= ZOBRIST_BLACK_TO_MOVE
+        if self.to_move == "white":
+            self.move_number += 1
+
+    def pop(self) -> tuple:
+        """Takes back the last pushed move and returns it."""
+        (move, src, dest, p, moved, captured, rook, rook_src, rook_moved, en_passant_target, halfmove_clock,
+         move_number, position_cache, zobrist_key, castling_rights) = self._undo_stack.pop()
+
+        # Removes the moved piece, or the piece it was promoted to
+        self.remove_at(dest)
+        if rook is not None:
+            self.remove_at(rook.pos())
+            rook.set_pos(*rook_src)
+            self._place(rook)
+            rook.moved = rook_moved
+        p.set_pos(*src)
+        self._place(p)
+        p.moved = moved
+        if captured is not None:
+            # Captured pieces keep their last position, which is where they go back to
+            self._place(captured)
+            self.captured_pieces[p.color].pop()
+            self.captured_value[p.color] -= self.piece_value(captured)
+
+        self.to_move = p.color
+        self.en_passant_target = en_passant_target
+        self.halfmove_clock = halfmove_clock
+        self.move_number = move_number
+        # The position is back to the one the cached checks and pins were computed for
+        self._position_cache = position_cache
+        self._position_cache_key = self.zobrist_key = zobrist_key
+        self._castling_rights = castling_rights
+        return move
+
+    def _promote_piece(self, pawn: Pawn, pos: Position, symbol: str):
+        self.remove_at(pos)
+        r, c = pos
+        symbol = symbol.upper() if pawn.color == "white" else symbol.lower()
+        if symbol.upper() == 'Q':
+            newp = Queen(r, c, pawn.color)
+        elif symbol.upper() == 'R':
+            newp = Rook(r, c, pawn.color)
+        elif symbol.upper() == 'B':
+            newp = Bishop(r, c, pawn.color)
+        else:
+            newp = Knight(r, c, pawn.color)
+        newp.moved = True
+        self._place(newp)
+
+    def has_any_legal_moves(self, color: str) -> bool:
+        # Iterate over a copy of the dictionary to avoid "dictionary keys changed during iteration" error
+        for pos, p in list(self.pieces.items()):
+            if p.color != color:
+                continue
+            if self.legal_moves_for(p):
+                return True
+        return False
+
+    def outcome(self) -> Optional[str]:
+        if self.in_check(self.to_move):
+            if not self.has_any_legal_moves(self.to_move):
+                return f"Checkmate — {'White' if self.to_move=='black' else 'Black'} wins!"
+            return None
+        else:
+            if not self.has_any_legal_moves(self.to_move):
+                return "Stalemate — draw."
+        return None
+
+    # --- PERFT ---
+    def perft_moves(self) -> List[tuple]:
+        """Legal moves for the side to move, with each promotion expanded into its four choices."""
+        moves = []
+        for src, dest in self.get_all_legal_moves(self.to_move):
+            if isinstance(self.pieces[src], Pawn) and dest[0] in (1, 8):
+                moves.extend((src, dest, symbol) for symbol in "QRBN")
+            else:
+                moves.append((src, dest))
+        return moves
+
+    def perft(self, depth: int) -> int:
+        """Counts the leaf nodes of the legal move tree to the given depth."""
+        if depth <= 0:
+            return 1
+        moves = self.perft_moves()
+        if depth == 1:
+            return len(moves)
+        nodes = 0
+        for move in moves:
+            self.push(move)
+            nodes += self.perft(depth - 1)
+            self.pop()
+        return nodes
+
+    def divide(self, depth: int) -> Dict[str, int]:
+        """Perft split by root move, keyed by long algebraic move (e.g. "e2e4", "a7a8q")."""
+        counts = {}
+        for move in self.perft_moves():
+            name = pos_to_algebraic(move[0]) + pos_to_algebraic(move[1])
+            if len(move) == 3:
+                name += move[2].lower()
+            self.push(move)
+            counts[name] = self.perft(depth - 1)
+            self.pop()
+        return counts
+
+    def piece_value(self, piece: Piece) -> int:
+        return PIECE_VALUES[piece.symbol.upper()]
+
+    def evaluate_board(self, color):
+        """Material plus piece-square bonuses for color, read from the running totals in O(1)."""
+        enemy = "black" if color == "white" else "white"
+        score = self.material[color] - self.material[enemy]
+        if self.use_pst:
+            score += (self.pst_score[color] - self.pst_score[enemy]) / 100
+        return score
+
+    def ai_move(self, time_ms: Optional[int] = None, max_depth: int = 2) -> Optional[tuple]:
+        """Finds and makes the best move for the side to move, returning it."""
+        best_move = self.find_best_move(time_ms, max_depth)
+        if best_move:
+            self.make_move(best_move[0], best_move[1], best_move[2] if len(best_move) > 2 else "Q")
+        return best_move
+
+    def find_best_move(self, time_ms: Optional[int] = None, max_depth: int = 2) -> Optional[tuple]:
+        """Iterative deepening: searches depth 1, 2, ... max_depth and returns the best move of the
+        last depth that finished before time_ms ran out. Each depth searches the previous best move first.
+        A move found in the opening book is returned without searching.
+
+        The search works on packed moves; the move returned is unpacked to (src, dest[, promotion]).
+        """
+        if self.book is not None:
+            book_move = self.book.choose(self)
+            if book_move is not None:
+                self.search_info = {"depth": 0, "move": book_move, "nodes": 0, "book": True}
+                return book_move
+        if self.tt is None:
+            self.tt = TranspositionTable(self.tt_size_mb)
+        self.tt.new_search()
+        
+        legal_moves = self.packed_moves(self.to_move)
+        if not legal_moves:
+            return None
+        # Shuffling first keeps variety among moves the ordering scores equally
+        random.shuffle(legal_moves)
+        self.killers = [[None, None] for _ in range(MAX_PLY)]
+        for move in self.history:
+            self.history[move] //= 2
+        if self.move_ordering:
+            self.order_moves(legal_moves, 0)
+        best_move = legal_moves[0]
+
+        self.nodes = 0
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        self.search_info = {}
+        self._deadline = time.perf_counter() + time_ms / 1000 if time_ms else None
+        if self._stop_requested:
+            self._deadline = 0.0
+        start = time.perf_counter()
+        stack_depth = len(self._undo_stack)
+        try:
+            for depth in range(1, max_depth + 1):
+                score, best_move = self._search_root(legal_moves, depth)
+                legal_moves.remove(best_move)
+                legal_moves.insert(0, best_move)
+                self.search_info = {"depth": depth, "score": score, "move": unpack_move(best_move), "nodes": self.nodes,
+                                    "cutoffs": self.cutoffs, "first_move_cutoffs": self.first_move_cutoffs,
+                                    "time_ms": (time.perf_counter() - start) * 1000}
+        except SearchTimeout:
+            # Unwind the moves the interrupted search had pushed
+            while len(self._undo_stack) > stack_depth:
+                self.pop()
+        finally:
+            self._deadline = None
+            self._stop_requested = False
+        return unpack_move(best_move)
+
+    def stop_search(self):
+        """Makes the running (or next) find_best_move return early. Safe to call from another thread."""
+        self._stop_requested = True
+        self._deadline = 0.0
+
+    def _search_root(self, legal_moves: List[int], depth: int,
+                     bound: Optional[float] = None) -> Tuple[float, Optional[int]]:
+        """Alpha-beta over the root moves. Given a bound, only a move scoring strictly better
+        than it is returned; if none does, the move is None and the score is the bound."""
+        maximizing = self.to_move == "black"
+        if not self.killers:
+            self.killers = [[None, None] for _ in range(MAX_PLY)]
+        if bound is None:
+            best_score = -float('inf') if maximizing else float('inf')
+            best_move = legal_moves[0]
+        else:
+            best_score, best_move = bound, None
+        for move in legal_moves:
+            self.push(move)
+            if maximizing:
+                score = self.minimax(depth - 1, best_score, float('inf'), False, 1)
+            else:
+                score = self.minimax(depth - 1, -float('inf'), best_score, True, 1)
+            self.pop()
+            
+            if (score > best_score) if maximizing else (score < best_score):
+                best_score = score
+                best_move = move
+        if best_move is not None:
+            self.tt.store(self.zobrist_key, depth, best_score, EXACT, best_move)
+        return best_score, best_move
+
+    def order_moves(self, moves, ply: int, hash_move: Optional[int] = None, count: Optional[int] = None):
+        """Sorts the first count packed moves in place: hash move, captures by MVV-LVA, this ply's
+        killers, then history score. moves is a list or a move buffer."""
+        count = len(moves) if count is None else count
+        scores = self._score_moves(moves, ply, hash_move, count)
+        for index in range(count):
+            self._pick_move(moves, scores, index, count)
+        return moves
+
+    def _score_moves(self, moves, ply: int, hash_move: Optional[int], count: int) -> array:
+        """Writes the ordering score of each of the first count moves into this ply's score buffer."""
+        arr = self.arr
+        killers = self.killers[ply] if ply < len(self.killers) else NO_KILLERS
+        history = self.history
+        scores = self._score_buffer(ply)
+        for i in range(count):
+            move = moves[i]
+            if move == hash_move:
+                score = 1_000_000
+            elif move >> 12 & FLAG_CAPTURE:
+                src, dest = move & 63, move >> 6 & 63
+                attacker = PIECE_VALUES[arr[src >> 3][src & 7].upper()] or 10
+                victim = arr[dest >> 3][dest & 7]
+                # En passant lands on an empty square and takes a pawn
+                victim = PIECE_VALUES[victim.upper()] if victim != " " else 1
+                # Most valuable victim first, least valuable attacker breaking ties (the king counts as 10)
+                score = 100_000 + 10 * victim - attacker
+            elif move == killers[0]:
+                score = 90_000
+            elif move == killers[1]:
+                score = 80_000
+            else:
+                score = min(history.get(move & 0xFFF, 0), 70_000)
+            scores[i] = score
+        return scores
+
+    @staticmethod
+    def _pick_move(moves, scores: array, index: int, count: int) -> int:
+        """Moves the best scored of moves[index:count] to index and returns it. The moves it
+        passes keep their order, so equal scores stay in generation order."""
+        best = max(range(index, count), key=scores.__getitem__)
+        if best != index:
+            moves.insert(index, moves.pop(best))
+            scores.insert(index, scores.pop(best))
+        return moves[index]
+
+    def _record_cutoff(self, move: int, index: int, depth: int, ply: int, quiet: bool):
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if quiet and ply < len(self.killers):
+            killers = self.killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+            self.history[move & 0xFFF] = self.history.get(move & 0xFFF, 0) + depth * depth
+
+    def minimax(self, depth, alpha, beta, maximizing_player, ply=1):
+        """Minimax algorithm with alpha-beta pruning and a transposition table."""
+        self.nodes += 1
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+        if depth == 0:
+            if self.use_quiescence:
+                return self.quiescence(alpha, beta, maximizing_player, ply)
+            return self.evaluate_board("black")
+
+        tt = self.tt
+        key = self.zobrist_key
+        hash_move = None
+        if tt is not None:
+            entry = tt.probe(key)
+            if entry is not None:
+                hash_move = entry[4]
+                if entry[1] >= depth:
+                    score, bound = entry[2], entry[3]
+                    if bound == EXACT:
+                        return score
+                    if bound == LOWER_BOUND and score >= beta:
+                        return score
+                    if bound == UPPER_BOUND and score <= alpha:
+                        return score
+        alpha_orig, beta_orig = alpha, beta
+
+        moves = self._move_buffer(ply)
+        color = "black" if maximizing_player else "white"
+        count = self.fill_packed_moves(moves, color)
+        if not count:
+            # Checkmate is lost outright; stalemate is a draw
+            if not self.in_check(color):
+                return 0
+            return -float('inf') if maximizing_player else float('inf')
+        # With ordering on, each move is picked from the rest just before it is searched, so
+        # after a cutoff the remaining moves are never sorted
+        scores = self._score_moves(moves, ply, hash_move, count) if self.move_ordering else None
+        if scores is None and hash_move is not None:
+            for index in range(count):
+                if moves[index] == hash_move:
+                    moves.pop(index)
+                    moves.insert(0, hash_move)
+                    break
+        best_move = None
+
+        if maximizing_player:
+            value = -float('inf')
+            for index in range(count):
+                move = moves[index] if scores is None else self._pick_move(moves, scores, index, count)
+                quiet = not move >> 12 & FLAG_CAPTURE
+                self.push(move)
+                evaluation = self.minimax(depth - 1, alpha, beta, False, ply + 1)
+                self.pop()
+                
+                if evaluation > value:
+                    value = evaluation
+                    best_move = move
+                alpha = max(alpha, evaluation)
+                if beta <= alpha:
+                    self._record_cutoff(move, index, depth, ply, quiet)
+                    break
+        else:
+            value = float('inf')
+            for index in range(count):
+                move = moves[index] if scores is None else self._pick_move(moves, scores, index, count)
+                quiet = not move >> 12 & FLAG_CAPTURE
+                self.push(move)
+                evaluation = self.minimax(depth - 1, alpha, beta, True, ply + 1)
+                self.pop()
+                
+                if evaluation < value:
+                    value = evaluation
+                    best_move = move
+                beta = min(beta, evaluation)
+                if beta <= alpha:
+                    self._record_cutoff(move, index, depth, ply, quiet)
+                    break
+
+        if tt is not None:
+            if value <= alpha_orig:
+                bound = UPPER_BOUND
+            elif value >= beta_orig:
+                bound = LOWER_BOUND
+            else:
+                bound = EXACT
+            tt.store(key, depth, value, bound, best_move)
+        return value
+
+    def quiescence(self, alpha, beta, maximizing_player, ply=0):
+        """Capture-only search from a leaf, so the score is never taken in the middle of an exchange.
+
+        The side to move may stand pat on the static evaluation. Captures that cannot bring the
+        score back within DELTA_MARGIN of the bound are skipped. When in check, every evasion
+        is searched instead and there is no stand-pat.
+        """
+        self.nodes += 1
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+        color = "black" if maximizing_player else "white"
+        in_check = self.in_check(color)
+        moves = self._move_buffer(ply)
+        if in_check:
+            count = self.fill_packed_moves(moves, color)
+            if not count:
+                return -float('inf') if maximizing_player else float('inf')
+            value = -float('inf') if maximizing_player else float('inf')
+        else:
+            stand_pat = self.evaluate_board("black")
+            if maximizing_player:
+                if stand_pat >= beta:
+                    return stand_pat
+                alpha = max(alpha, stand_pat)
+            else:
+                if stand_pat <= alpha:
+                    return stand_pat
+                beta = min(beta, stand_pat)
+            value = stand_pat
+            count = self.fill_packed_moves(moves, color, captures_only=True)
+        scores = self._score_moves(moves, ply, None, count)
+
+        for index in range(count):
+            move = self._pick_move(moves, scores, index, count)
+            if not in_check:
+                dest = move >> 6 & 63
+                victim = self.arr[dest >> 3][dest & 7]
+                # An empty destination is an en passant capture
+                gain = PIECE_VALUES[victim.upper()] if victim != " " else 1
+                if move >> 12 & FLAG_PROMOTION:
+                    gain += 8  # the pawn also becomes a queen
+                if maximizing_player and stand_pat + gain + DELTA_MARGIN <= alpha:
+                    continue
+                if not maximizing_player and stand_pat - gain - DELTA_MARGIN >= beta:
+                    continue
+            self.push(move)
+            score = self.quiescence(alpha, beta, not maximizing_player, ply + 1)
+            self.pop()
+            if maximizing_player:
+                value = max(value, score)
+                alpha = max(alpha, score)
+            else:
+                value = min(value, score)
+                beta = min(beta, score)
+            if beta <= alpha:
+                break
+        return value
@@ -1,10 +1,14 @@
 import pygame
+import argparse
 import sys
 import os
 import random
+import time
 from typing import List, Tuple, Dict, Optional, Any
 
-pygame.init()
+import engine
+import surfaces
+from surfaces import DirtyRenderer, SurfaceCache
 
 # Constants
 SCREEN_WIDTH = 1000
@@ -12,6 +16,8 @@ SCREEN_HEIGHT = 800
 BOARD_SIZE_PX = 800
 BOARD_SIZE = 8
 SQUARE_SIZE = BOARD_SIZE_PX // BOARD_SIZE
+SIDEBAR_RECT = (BOARD_SIZE_PX, 0, SCREEN_WIDTH - BOARD_SIZE_PX, SCREEN_HEIGHT)
+SQUARES = [(row, col) for row in range(1, BOARD_SIZE + 1) for col in range(1, BOARD_SIZE + 1)]
 FPS = 60
 
 # Colors
@@ -29,18 +35,32 @@ BAR_BLACK = (200, 200, 200)
 BAR_WHITE = (50, 50, 50)
 
 # Fonts
-pygame.font.init()
 FONT_SIZE_NORMAL = 24
 FONT_SIZE_LARGE = 48
 FONT_SIZE_BOLD = 32
-FONT = pygame.font.SysFont('Arial', FONT_SIZE_NORMAL)
-LARGE_FONT = pygame.font.SysFont('Arial', FONT_SIZE_LARGE, bold=True)
-BOLD_FONT = pygame.font.SysFont('Arial', FONT_SIZE_BOLD, bold=True)
-
-# Screen setup
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Chess Engine")
-clock = pygame.time.Clock()
+FONT = None
+LARGE_FONT = None
+BOLD_FONT = None
+
+# Screen setup, done by init_display() when the GUI starts so that importing
+# Game or AIOpponent does not open a window or load fonts
+screen = None
+clock = None
+
+def init_display():
+    """Initialises pygame and creates the window, clock and fonts once."""
+    global FONT, LARGE_FONT, BOLD_FONT, screen, clock
+    if screen is not None:
+        return screen
+    pygame.init()
+    pygame.font.init()
+    FONT = pygame.font.SysFont('Arial', FONT_SIZE_NORMAL)
+    LARGE_FONT = pygame.font.SysFont('Arial', FONT_SIZE_LARGE, bold=True)
+    BOLD_FONT = pygame.font.SysFont('Arial', FONT_SIZE_BOLD, bold=True)
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Chess Engine")
+    clock = pygame.time.Clock()
+    return screen
 
 Position = Tuple[int, int]
 PieceSymbol = str
@@ -281,6 +301,12 @@ class Pawn(Piece):
 
         return moves
 
+# Offsets from a square to the squares its attackers can stand on
+KNIGHT_VECTORS = [(2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2)]
+ROOK_VECTORS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+BISHOP_VECTORS = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+KING_VECTORS = ROOK_VECTORS + BISHOP_VECTORS
+
 class Game:
     def __init__(self):
         self.reset_game()
@@ -290,6 +316,9 @@ class Game:
         self.board = {}
         self.to_move = "white"
         self.en_passant_target: Optional[Position] = None
+        # FEN move counters: plies since the last pawn move or capture, and the full move number
+        self.halfmove_clock = 0
+        self.move_number = 1
         self.captured_pieces: Dict[str, List[Piece]] = {"white": [], "black": []}
         self.kings: Dict[str, Optional[King]] = {"white": None, "black": None}
         self.setup_board()
@@ -354,34 +383,40 @@ class Game:
         return self.is_attacked(king.pos(), color)
 
     def is_attacked(self, pos: Position, by_color: str) -> bool:
+        """True if a piece of the side opposing by_color attacks pos.
+
+        Looks outwards from pos: the knight, king and pawn squares that could attack it, then
+        each of the eight rays up to its first piece, so the cost does not grow with the piece count.
+        """
         opponent_color = "white" if by_color == "black" else "black"
-        for piece in self.pieces:
-            if piece.color == opponent_color:
-                if isinstance(piece, Pawn):
-                    direction = 1 if piece.color == "white" else -1
-                    if (piece.row + direction, piece.col - 1) == pos or \
-                       (piece.row + direction, piece.col + 1) == pos:
-                        return True
-                elif isinstance(piece, Knight):
-                    for dr, dc in piece.get_possible_move_vectors():
-                        if (piece.row + dr, piece.col + dc) == pos:
-                            return True
-                elif isinstance(piece, King):
-                    for dr, dc in piece.get_possible_move_vectors():
-                        if (piece.row + dr, piece.col + dc) == pos:
+        row, col = pos
+        board = self.board
+        # Off-board squares are simply missing from self.board
+        for dr, dc in KNIGHT_VECTORS:
+            piece = board.get((row + dr, col + dc))
+            if piece and piece.color == opponent_color and isinstance(piece, Knight):
+                return True
+        for dr, dc in KING_VECTORS:
+            piece = board.get((row + dr, col + dc))
+            if piece and piece.color == opponent_color and isinstance(piece, King):
+                return True
+        # An attacking pawn stands one row behind pos, from the attacker's side
+        pawn_row = row - 1 if opponent_color == "white" else row + 1
+        for dc in (-1, 1):
+            piece = board.get((pawn_row, col + dc))
+            if piece and piece.color == opponent_color and isinstance(piece, Pawn):
+                return True
+        for vectors, sliders in ((ROOK_VECTORS, (Rook, Queen)), (BISHOP_VECTORS, (Bishop, Queen))):
+            for dr, dc in vectors:
+                end_row, end_col = row + dr, col + dc
+                while 1 <= end_row <= 8 and 1 <= end_col <= 8:
+                    piece = board.get((end_row, end_col))
+                    if piece:
+                        if piece.color == opponent_color and isinstance(piece, sliders):
                             return True
-                else: # Rook, Bishop, Queen
-                    for dr, dc in piece.get_possible_move_vectors():
-                        for i in range(1, 8):
-                            end_row, end_col = piece.row + dr * i, piece.col + dc * i
-                            if not (1 <= end_row <= 8 and 1 <= end_col <= 8):
-                                break
-                            
-                            end_piece = self.piece_at((end_row, end_col))
-                            if (end_row, end_col) == pos:
-                                return True
-                            if end_piece:
-                                break
+                        break
+                    end_row += dr
+                    end_col += dc
         return False
     
     def legal_moves_for(self, piece: Piece) -> List[Position]:
@@ -389,15 +424,48 @@ class Game:
         possible_moves = piece.get_possible_moves(self)
         
         for end_pos in possible_moves:
-            temp_game = self.copy()
-            temp_game.make_move(piece.pos(), end_pos, dry_run=True)
-            if not temp_game.in_check(piece.color):
+            # Try the move on this game and take it back, instead of testing it on a copy
+            undo = self.try_move(piece, end_pos)
+            if not self.in_check(piece.color):
                 moves.append(end_pos)
+            self.undo_try(piece, undo)
         return moves
 
+    def try_move(self, piece: Piece, end_pos: Position) -> tuple:
+        """Moves piece to end_pos in place, only far enough to test for check, and returns what undo_try needs.
+
+        The castling rook stays put and a promoting pawn stays a pawn: neither changes whether
+        the mover's own king is attacked.
+        """
+        start_pos = piece.pos()
+        captured_pos = end_pos
+        if isinstance(piece, Pawn) and end_pos == self.en_passant_target and end_pos[1] != start_pos[1]:
+            captured_pos = (start_pos[0], end_pos[1])
+        captured = self.board.pop(captured_pos, None)
+        index = None
+        if captured:
+            index = self.pieces.index(captured)
+            del self.pieces[index]
+        del self.board[start_pos]
+        piece.row, piece.col = end_pos
+        self.board[end_pos] = piece
+        return start_pos, captured_pos, captured, index
+
+    def undo_try(self, piece: Piece, undo: tuple):
+        start_pos, captured_pos, captured, index = undo
+        del self.board[piece.pos()]
+        piece.row, piece.col = start_pos
+        self.board[start_pos] = piece
+        if captured:
+            # Back at the same index, so loops over self.pieces are not disturbed
+            self.pieces.insert(index, captured)
+            self.board[captured_pos] = captured
+
     def get_all_legal_moves(self, color: str) -> Dict[Position, List[Position]]:
         all_moves = {}
         for piece in self.pieces:
+            # try_move relies on self.board holding every piece in self.pieces
+            assert self.board.get(piece.pos()) is piece, f"{piece} is not on the board"
             if piece.color == color:
                 legal_moves = self.legal_moves_for(piece)
                 if legal_moves:
@@ -415,25 +483,6 @@ class Game:
                 return "Stalemate!"
         return None
     
-    def copy(self):
-        new_game = Game()
-        new_game.pieces = [
-            type(p)(p.row, p.col, p.color) 
-            if not isinstance(p, (King, Queen, Rook, Bishop, Knight, Pawn)) else p
-            for p in self.pieces
-        ]
-        new_game.board = {p.pos(): p for p in new_game.pieces}
-        new_game.to_move = self.to_move
-        new_game.captured_pieces = {
-            "white": [
-                type(p)(p.row, p.col, p.color) for p in self.captured_pieces["white"]
-            ],
-            "black": [
-                type(p)(p.row, p.col, p.color) for p in self.captured_pieces["black"]
-            ],
-        }
-        return new_game
-
     def make_move(self, start_pos: Position, end_pos: Position, dry_run: bool = False, promo_piece: Optional[str] = None) -> bool:
         piece = self.piece_at(start_pos)
         if not piece or piece.color != self.to_move:
@@ -442,6 +491,7 @@ class Game:
         
             
         if not dry_run:
+            resets_clock = isinstance(piece, Pawn) or self.piece_at(end_pos) is not None
             self.en_passant_target = None
             
             # Pawn promotion
@@ -460,6 +510,13 @@ class Game:
                     new_piece = Knight(piece.row, piece.col, piece.color)
                 
                 if new_piece:
+                    # A capturing promotion takes the piece off end_pos here, since the
+                    # move_piece call below finds no pawn left to move
+                    captured_piece = self.piece_at(end_pos)
+                    if captured_piece:
+                        self.pieces.remove(captured_piece)
+                        self.captured_pieces[piece.color].append(captured_piece)
+                        del self.board[end_pos]
                     self.pieces.remove(piece)
                     del self.board[piece.pos()]
                     new_piece.row, new_piece.col = end_pos
@@ -487,26 +544,150 @@ class Game:
                 self.en_passant_target = (start_pos[0] + piece.direction, start_pos[1])
                 
             self.move_piece(start_pos, end_pos)
+            self.halfmove_clock = 0 if resets_clock else self.halfmove_clock + 1
+            if self.to_move == "black":
+                self.move_number += 1
             self.to_move = "black" if self.to_move == "white" else "white"
 
         return True
 
+    def to_fen(self) -> str:
+        """The position as a FEN string."""
+        rows = []
+        for row in range(8, 0, -1):
+            text, empty = "", 0
+            for col in range(1, 9):
+                piece = self.piece_at((row, col))
+                if piece is None:
+                    empty += 1
+                    continue
+                text += (str(empty) if empty else "") + piece.symbol
+                empty = 0
+            rows.append(text + (str(empty) if empty else ""))
+        castling = ""
+        for color, row in (("white", 1), ("black", 8)):
+            king = self.kings[color]
+            if king is None or king.has_moved or king.pos() != (row, 5):
+                continue
+            for rook_col, letter in ((8, "K"), (1, "Q")):
+                rook = self.piece_at((row, rook_col))
+                if isinstance(rook, Rook) and rook.color == color and not rook.has_moved:
+                    castling += letter if color == "white" else letter.lower()
+        en_passant = "-"
+        if self.en_passant_target:
+            en_passant = COL_TO_FILE[self.en_passant_target[1]] + str(self.en_passant_target[0])
+        return f"{'/'.join(rows)} {self.to_move[0]} {castling or '-'} {en_passant} {self.halfmove_clock} {self.move_number}"
+
+# AI strategies: each picks a move for the side to move and reports the work it did
+class Strategy:
+    name = "strategy"
+
+    def __init__(self):
+        self.nodes = 0
+        self.seconds = 0.0
+
+    def choose(self, game: Game) -> Optional[Tuple[Position, Position]]:
+        raise NotImplementedError
+
+    def nodes_per_second(self) -> float:
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    def report(self) -> str:
+        return f"{self.name}: {self.nodes} nodes, {self.nodes_per_second():,.0f} nodes/s"
+
+class RandomStrategy(Strategy):
+    """A random piece, then a random legal move for it. Nodes are the legal moves generated."""
+    name = "random"
+
+    def choose(self, game):
+        legal_moves = game.get_all_legal_moves(game.to_move)
+        self.nodes = sum(len(moves) for moves in legal_moves.values())
+        if not legal_moves:
+            return None
+        start_pos = random.choice(list(legal_moves.keys()))
+        return start_pos, random.choice(legal_moves[start_pos])
+
+class GreedyCaptureStrategy(Strategy):
+    """Takes the most valuable piece it can, or plays a random move when nothing can be captured."""
+    name = "greedy"
+
+    def choose(self, game):
+        moves = [(start_pos, end_pos) for start_pos, ends in game.get_all_legal_moves(game.to_move).items()
+                 for end_pos in ends]
+        self.nodes = len(moves)
+        if not moves:
+            return None
+        random.shuffle(moves)
+
+        def gain(move):
+            victim = game.piece_at(move[1])
+            if victim is None:
+                # En passant is the only capture onto an empty square
+                is_pawn = isinstance(game.piece_at(move[0]), Pawn)
+                return 1 if is_pawn and move[1] == game.en_passant_target and move[0][1] != move[1][1] else 0
+            return victim.value
+
+        return max(moves, key=gain)
+
+class AlphaBetaStrategy(Strategy):
+    """Fixed-depth alpha-beta search, run by engine.Game on the current position.
+
+    The transposition table and history carry over from one move to the next.
+    """
+    name = "alphabeta"
+
+    def __init__(self, depth: int = 3):
+        super().__init__()
+        self.depth = depth
+        self.time_ms: Optional[int] = None
+        self.tt = None
+        self.history: Dict[int, int] = {}
+        self.search_info: Dict[str, Any] = {}
+
+    def choose(self, game):
+        searcher = engine.Game.from_fen(game.to_fen())
+        searcher.tt, searcher.history = self.tt, self.history
+        move = searcher.find_best_move(time_ms=self.time_ms, max_depth=self.depth)
+        self.tt, self.history = searcher.tt, searcher.history
+        self.nodes = searcher.nodes
+        self.search_info = searcher.search_info
+        return move
+
+    def report(self) -> str:
+        return f"{super().report()}, depth {self.search_info.get('depth', 0)}"
+
+class IterativeDeepeningStrategy(AlphaBetaStrategy):
+    """Searches one ply deeper at a time until time_ms is spent, and plays the deepest finished result."""
+    name = "iterative"
+
+    def __init__(self, time_ms: int = 1000, max_depth: int = 32):
+        super().__init__(max_depth)
+        self.time_ms = time_ms
+
+STRATEGIES = {cls.name: cls for cls in (RandomStrategy, GreedyCaptureStrategy, AlphaBetaStrategy,
+                                         IterativeDeepeningStrategy)}
+
 class AIOpponent:
-    def __init__(self, game):
+    def __init__(self, game, strategy: Optional[Strategy] = None):
         self.game = game
+        self.strategy = strategy or RandomStrategy()
 
     def make_move(self):
-        legal_moves = self.game.get_all_legal_moves("black")
-        if not legal_moves:
+        start = time.perf_counter()
+        move = self.strategy.choose(self.game)
+        self.strategy.seconds = time.perf_counter() - start
+        if move is None:
             return False
-            
-        start_pos = random.choice(list(legal_moves.keys()))
-        end_pos = random.choice(legal_moves[start_pos])
 
-        return self.game.make_move(start_pos, end_pos)
+        start_pos, end_pos = move[0], move[1]
+        promo_piece = None
+        if isinstance(self.game.piece_at(start_pos), Pawn) and end_pos[0] in (1, 8):
+            promo_piece = move[2].lower() if len(move) > 2 and move[2] else 'q'
+        return self.game.make_move(start_pos, end_pos, promo_piece=promo_piece)
 
 class ChessGUI:
     def __init__(self, game, ai_opponent):
+        init_display()
         self.game = game
         self.ai_opponent = ai_opponent
         self.selected: Optional[Position] = None
@@ -525,13 +706,19 @@ class ChessGUI:
             self.sound_check = pygame.mixer.Sound(os.path.join("sounds", "check.wav"))
             self.sound_game_over = pygame.mixer.Sound(os.path.join("sounds", "game_over.wav"))
             self.sound_checkmate = pygame.mixer.Sound(os.path.join("sounds", "checkmate.wav"))
-        except pygame.error:
+        except (pygame.error, FileNotFoundError):
             print("Sound files not found. Sounds will be disabled.")
             self.sound_on = False
 
         self.load_images()
         self.screen_changed_callback = None
         self.current_lesson: Optional[Dict[str, str]] = None
+        # What is on screen now, so each frame redraws and updates only what changed
+        self._drawn_menu = None
+        self.renderer = DirtyRenderer(self.draw_frame, self.draw_square, self.square_rect,
+                                      self.draw_sidebar, SIDEBAR_RECT)
+        # Text, overlays, scaled pieces and the empty board are rendered once and reused
+        self.surfaces = SurfaceCache()
     
     def set_screen_changed_callback(self, callback):
         if callable(callback):
@@ -601,65 +788,115 @@ class ChessGUI:
                 
                 self.piece_images[piece_symbol] = surface
 
-    def draw_board(self):
-        for r in range(BOARD_SIZE):
-            for c in range(BOARD_SIZE):
-                color = WHITE if (r + c) % 2 == 0 else BLACK
-                rect = pygame.Rect(c * SQUARE_SIZE, r * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE)
-                pygame.draw.rect(screen, color, rect)
-
-        if self.selected:
-            pygame.draw.rect(screen, HIGHLIGHT, (
-                (self.selected[1] - 1) * SQUARE_SIZE,
-                (BOARD_SIZE - self.selected[0]) * SQUARE_SIZE,
-                SQUARE_SIZE,
-                SQUARE_SIZE
-            ), 5)
-            
-        if self.game.in_check(self.game.to_move):
-            king_pos = self.game.kings[self.game.to_move].pos()
-            if king_pos:
-                pygame.draw.rect(screen, CHECK_RED, (
-                    (king_pos[1] - 1) * SQUARE_SIZE,
-                    (BOARD_SIZE - king_pos[0]) * SQUARE_SIZE,
-                    SQUARE_SIZE,
-                    SQUARE_SIZE
-                ), 5)
-
-        for move in self.valid_moves:
-            pygame.draw.circle(screen, MOVE_HIGHLIGHT, (
-                (move[1] - 1) * SQUARE_SIZE + SQUARE_SIZE // 2,
-                (BOARD_SIZE - move[0]) * SQUARE_SIZE + SQUARE_SIZE // 2
-            ), SQUARE_SIZE // 8)
-            
-    def draw_pieces(self):
-        for piece in self.game.pieces:
-            img = self.piece_images.get(piece.symbol)
-            if img:
-                screen.blit(img, (
-                    (piece.col - 1) * SQUARE_SIZE,
-                    (BOARD_SIZE - piece.row) * SQUARE_SIZE
-                ))
+    def board_background(self) -> pygame.Surface:
+        """The empty board, drawn once."""
+        def make():
+            background = pygame.Surface((BOARD_SIZE_PX, BOARD_SIZE_PX))
+            for r in range(BOARD_SIZE):
+                for c in range(BOARD_SIZE):
+                    color = WHITE if (r + c) % 2 == 0 else BLACK
+                    pygame.draw.rect(background, color, (c * SQUARE_SIZE, r * SQUARE_SIZE, SQUARE_SIZE, SQUARE_SIZE))
+            return background
+        return self.surfaces.get("board background", make)
+
+    def draw_board(self, squares):
+        screen.blit(self.board_background(), (0, 0))
+        for pos, state in squares.items():
+            self.draw_square(pos, state, background_drawn=True)
+
+    def square_rect(self, pos: Position) -> pygame.Rect:
+        return surfaces.square_rect(pos, (0, 0), SQUARE_SIZE)
+
+    def square_state(self, pos: Position, check_pos: Optional[Position]) -> tuple:
+        piece = self.game.piece_at(pos)
+        return surfaces.square_state(piece.symbol if piece else None, pos, self.selected, self.valid_moves, check_pos)
+
+    def draw_square(self, pos: Position, state: tuple, background_drawn: bool = False):
+        """Draws one square: its colour, the selection and check outlines, the move dot, then the piece."""
+        symbol, selected, move, check = state
+        rect = self.square_rect(pos)
+        if not background_drawn:
+            screen.blit(self.board_background(), rect, rect)
+        if selected:
+            pygame.draw.rect(screen, HIGHLIGHT, rect, 5)
+        if check:
+            pygame.draw.rect(screen, CHECK_RED, rect, 5)
+        if move:
+            pygame.draw.circle(screen, MOVE_HIGHLIGHT, rect.center, SQUARE_SIZE // 8)
+        img = self.piece_images.get(symbol)
+        if img:
+            screen.blit(img, rect)
     
     def draw_coords(self):
         for i in range(1, 9):
-            text = FONT.render(COL_TO_FILE[i], True, COORD_COLOR)
+            text = self.surfaces.text(FONT, COL_TO_FILE[i], COORD_COLOR)
             text_rect = text.get_rect(center=(
                 (i - 1) * SQUARE_SIZE + SQUARE_SIZE // 2,
                 BOARD_SIZE_PX + 20
             ))
             screen.blit(text, text_rect)
             
-            text = FONT.render(str(i), True, COORD_COLOR)
+            text = self.surfaces.text(FONT, str(i), COORD_COLOR)
             text_rect = text.get_rect(center=(
                 -20,
                 (BOARD_SIZE - i) * SQUARE_SIZE + SQUARE_SIZE // 2
             ))
             screen.blit(text, text_rect)
             
+    def menu_buttons(self) -> List[pygame.Rect]:
+        """The buttons of the current menu screen, as placed when it was last drawn."""
+        if self.game_mode == "Start":
+            names = ["play_button", "lessons_button", "quit_button", "audio_button"]
+        else:
+            names = ["back_button"]
+        buttons = [getattr(self, name, None) for name in names]
+        if self.game_mode == "Lessons":
+            buttons += getattr(self, "lesson_buttons", [])
+        return [button for button in buttons if button is not None]
+
+    def render_menu(self, draw):
+        """Calls draw, which redraws a whole menu screen, only when the screen or a button's hover state changed."""
+        mouse_pos = pygame.mouse.get_pos()
+        hover = tuple(button.collidepoint(mouse_pos) for button in self.menu_buttons())
+        frame = (self.game_mode, self.current_lesson and self.current_lesson['title'], self.sound_on, hover)
+        if frame != self._drawn_menu:
+            draw()
+            # Drawing places the buttons, so take the hover state from the new ones
+            hover = tuple(button.collidepoint(mouse_pos) for button in self.menu_buttons())
+            self._drawn_menu = frame[:3] + (hover,)
+            self.renderer.invalidate()
+
+    def render_game(self):
+        """Draws one game frame; the renderer repaints only the squares and panels that changed."""
+        king = self.game.kings[self.game.to_move]
+        check_pos = king.pos() if king and self.game.in_check(self.game.to_move) else None
+        squares = {pos: self.square_state(pos, check_pos) for pos in SQUARES}
+        strategy = self.ai_opponent.strategy
+        sidebar = (self.game.get_score(), tuple(p.symbol for p in self.game.captured_pieces["white"]),
+                   tuple(p.symbol for p in self.game.captured_pieces["black"]),
+                   strategy.name, strategy.nodes, strategy.seconds)
+        overlay = None
+        if self.promoting or self.game_over_text:
+            button = getattr(self, "play_again_button", None)
+            overlay = (self.promoting, self.game_over_text,
+                       bool(button and button.collidepoint(pygame.mouse.get_pos())))
+        if self.renderer.render(squares, sidebar, overlay):
+            self._drawn_menu = None
+
+    def draw_frame(self, squares):
+        """Draws the whole game window: board, coordinates, sidebar and any dialog."""
+        screen.fill(BACKGROUND_COLOR)
+        self.draw_board(squares)
+        self.draw_coords()
+        self.draw_sidebar()
+        if self.promoting:
+            self.draw_promotion_dialog()
+        if self.game_over_text:
+            self.draw_game_over()
+
     def draw_start_menu(self):
         screen.fill(BACKGROUND_COLOR)
-        title_text = LARGE_FONT.render("Chess Engine", True, WHITE)
+        title_text = self.surfaces.text(LARGE_FONT, "Chess Engine", WHITE)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 4))
         screen.blit(title_text, title_rect)
 
@@ -693,7 +930,7 @@ class ChessGUI:
 
     def draw_lessons_menu(self):
         screen.fill(BACKGROUND_COLOR)
-        title_text = LARGE_FONT.render("Lessons", True, WHITE)
+        title_text = self.surfaces.text(LARGE_FONT, "Lessons", WHITE)
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 100))
         screen.blit(title_text, title_rect)
 
@@ -720,14 +957,14 @@ class ChessGUI:
     def draw_lesson_screen(self):
         screen.fill(BACKGROUND_COLOR)
         if self.current_lesson:
-            title_text = BOLD_FONT.render(self.current_lesson['title'], True, WHITE)
+            title_text = self.surfaces.text(BOLD_FONT, self.current_lesson['title'], WHITE)
             title_rect = title_text.get_rect(center=(SCREEN_WIDTH // 2, 100))
             screen.blit(title_text, title_rect)
             
             content_text = self.current_lesson['content']
             y_offset = 150
             for line in content_text.split('\n'):
-                text_surf = FONT.render(line, True, WHITE)
+                text_surf = self.surfaces.text(FONT, line, WHITE)
                 screen.blit(text_surf, (100, y_offset))
                 y_offset += 30
         
@@ -745,7 +982,7 @@ class ChessGUI:
         color = hover_color if rect.collidepoint(mouse_pos) else BUTTON_COLOR
         pygame.draw.rect(screen, color, rect, border_radius=10)
         
-        text_surf = FONT.render(text, True, TEXT_COLOR)
+        text_surf = self.surfaces.text(FONT, text, TEXT_COLOR)
         text_rect = text_surf.get_rect(center=rect.center)
         screen.blit(text_surf, text_rect)
         return rect
@@ -855,11 +1092,9 @@ class ChessGUI:
                 self.valid_moves = self.game.legal_moves_for(piece)
 
     def draw_game_over(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 150))
-        screen.blit(overlay, (0, 0))
+        self.surfaces.shade(screen, screen.get_rect())
 
-        text_surf = LARGE_FONT.render(self.game_over_text, True, WHITE)
+        text_surf = self.surfaces.text(LARGE_FONT, self.game_over_text, WHITE)
         text_rect = text_surf.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50))
         screen.blit(text_surf, text_rect)
 
@@ -884,9 +1119,7 @@ class ChessGUI:
                 self.game_over_text = None
                 
     def draw_promotion_dialog(self):
-        overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 150))
-        screen.blit(overlay, (0, 0))
+        self.surfaces.shade(screen, screen.get_rect())
 
         dialog_width, dialog_height = 400, 200
         dialog_rect = pygame.Rect(
@@ -897,7 +1130,7 @@ class ChessGUI:
         pygame.draw.rect(screen, WHITE, dialog_rect, border_radius=10)
         pygame.draw.rect(screen, BLACK, dialog_rect, 2, border_radius=10)
 
-        text_surf = FONT.render("Promote to:", True, TEXT_COLOR)
+        text_surf = self.surfaces.text(FONT, "Promote to:", TEXT_COLOR)
         text_rect = text_surf.get_rect(center=(dialog_rect.centerx, dialog_rect.top + 30))
         screen.blit(text_surf, text_rect)
 
@@ -944,10 +1177,10 @@ class ChessGUI:
                 return
 
     def draw_sidebar(self):
-        sidebar_rect = pygame.Rect(BOARD_SIZE_PX, 0, SCREEN_WIDTH - BOARD_SIZE_PX, SCREEN_HEIGHT)
+        sidebar_rect = pygame.Rect(SIDEBAR_RECT)
         pygame.draw.rect(screen, BACKGROUND_COLOR, sidebar_rect)
 
-        title_text = BOLD_FONT.render("Game Stats", True, WHITE)
+        title_text = self.surfaces.text(BOLD_FONT, "Game Stats", WHITE)
         title_rect = title_text.get_rect(center=(
             (BOARD_SIZE_PX + SCREEN_WIDTH) // 2,
             50
@@ -956,42 +1189,52 @@ class ChessGUI:
         
         self.draw_score()
         self.draw_captured_pieces()
+        self.draw_ai_stats()
         
     def draw_score(self):
         score = self.game.get_score()
         score_text = f"Score: {'+' if score > 0 else ''}{score}"
         
-        score_surf = BOLD_FONT.render(score_text, True, WHITE)
+        score_surf = self.surfaces.text(BOLD_FONT, score_text, WHITE)
         score_rect = score_surf.get_rect(center=((BOARD_SIZE_PX + SCREEN_WIDTH) // 2, 100))
         screen.blit(score_surf, score_rect)
 
     def draw_captured_pieces(self):
-        white_captures_text = BOLD_FONT.render("White Captured", True, BAR_BLACK)
+        white_captures_text = self.surfaces.text(BOLD_FONT, "White Captured", BAR_BLACK)
         screen.blit(white_captures_text, (BOARD_SIZE_PX + 20, 150))
         
         y_offset = 180
         for i, piece in enumerate(self.game.captured_pieces["black"]):
             img = self.piece_images.get(piece.symbol)
             if img:
-                scaled_img = pygame.transform.scale(img, (SQUARE_SIZE // 2, SQUARE_SIZE // 2))
+                scaled_img = self.surfaces.scaled(piece.symbol, img, (SQUARE_SIZE // 2, SQUARE_SIZE // 2))
                 screen.blit(scaled_img, (
                     BOARD_SIZE_PX + 20 + (i % 8) * (SQUARE_SIZE // 2 + 5),
                     y_offset + (i // 8) * (SQUARE_SIZE // 2 + 5)
                 ))
                 
-        black_captures_text = BOLD_FONT.render("Black Captured", True, BAR_WHITE)
+        black_captures_text = self.surfaces.text(BOLD_FONT, "Black Captured", BAR_WHITE)
         screen.blit(black_captures_text, (BOARD_SIZE_PX + 20, 300))
         
         y_offset = 330
         for i, piece in enumerate(self.game.captured_pieces["white"]):
             img = self.piece_images.get(piece.symbol)
             if img:
-                scaled_img = pygame.transform.scale(img, (SQUARE_SIZE // 2, SQUARE_SIZE // 2))
+                scaled_img = self.surfaces.scaled(piece.symbol, img, (SQUARE_SIZE // 2, SQUARE_SIZE // 2))
                 screen.blit(scaled_img, (
                     BOARD_SIZE_PX + 20 + (i % 8) * (SQUARE_SIZE // 2 + 5),
                     y_offset + (i // 8) * (SQUARE_SIZE // 2 + 5)
                 ))
 
+    def draw_ai_stats(self):
+        strategy = self.ai_opponent.strategy
+        if not strategy.seconds:
+            return
+        lines = [f"AI: {strategy.name}", f"{strategy.nodes} nodes in {strategy.seconds:.2f}s",
+                 f"{strategy.nodes_per_second():,.0f} nodes/s"]
+        for i, line in enumerate(lines):
+            screen.blit(self.surfaces.text(FONT, line, TEXT_COLOR), (BOARD_SIZE_PX + 20, 480 + i * 30))
+
     def run(self):
         running = True
         while running:
@@ -1004,11 +1247,11 @@ class ChessGUI:
                     self.handle_mouse_click(event)
 
             if self.game_mode == "Start":
-                self.draw_start_menu()
+                self.render_menu(self.draw_start_menu)
             elif self.game_mode == "Lessons":
-                self.draw_lessons_menu()
+                self.render_menu(self.draw_lessons_menu)
             elif self.game_mode == "LessonContent":
-                self.draw_lesson_screen()
+                self.render_menu(self.draw_lesson_screen)
             elif self.game_mode == "Game":
                 # Check for AI move
                 if self.game.to_move == "black" and not self.game_over_text:
@@ -1024,23 +1267,27 @@ class ChessGUI:
                             if self.sound_on:
                                 self.sound_game_over.play()
 
-                screen.fill(BACKGROUND_COLOR)
-                self.draw_board()
-                self.draw_pieces()
-                self.draw_coords()
-                self.draw_sidebar()
-                if self.promoting:
-                    self.draw_promotion_dialog()
-                if self.game_over_text:
-                    self.draw_game_over()
-                pygame.display.flip()
+                self.render_game()
 
         pygame.quit()
         sys.exit()
 
-def main():
+def make_strategy(name: str, depth: int = 3, time_ms: int = 1000) -> Strategy:
+    if name == "alphabeta":
+        return AlphaBetaStrategy(depth)
+    if name == "iterative":
+        return IterativeDeepeningStrategy(time_ms)
+    return STRATEGIES[name]()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Chess with lessons against an AI opponent.")
+    parser.add_argument("--ai", choices=sorted(STRATEGIES), default="random", help="AI strategy (default random)")
+    parser.add_argument("--depth", type=int, default=3, help="search depth for alphabeta")
+    parser.add_argument("--time-ms", type=int, default=1000, help="time per move for iterative")
+    args = parser.parse_args(argv)
+
     game = Game()
-    ai_opponent = AIOpponent(game)
+    ai_opponent = AIOpponent(game, make_strategy(args.ai, args.depth, args.time_ms))
     gui = ChessGUI(game, ai_opponent)
     gui.run()
 
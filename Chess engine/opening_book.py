@@ -0,0 +1,181 @@
+# Opening book: a sorted binary file of (position key, move, weight) entries that is
+# memory-mapped on first use and binary-searched, so loading costs nothing and a probe
+# takes microseconds. Keys are the engine's own Zobrist keys (Game.zobrist_key).
+# Usage:
+#   python opening_book.py build games.pgn [more.pgn ...] -o book.bin [--plies 16] [--min-games 2]
+#   python opening_book.py probe book.bin [--fen "<fen>"]
+#
+# Each 16-byte entry is: key (u64), move (u16), weight (u16), games (u32), big-endian.
+# The move is the engine's packed move (engine.pack_move: from-square in bits 0-5, to-square
+# in bits 6-11, squares indexed a1=0 .. h8=63) keeping only the promotion flag bits.
+
+import argparse
+import mmap
+import random
+import struct
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from engine import FLAG_PROMOTION, FLAG_QUIET, Game, PROMOTION_PIECES, START_FEN, pack_move, unpack_move
+
+ENTRY = struct.Struct(">QHHI")
+KEY = struct.Struct(">Q")
+# Capture, castling and en passant flags are left out: the board tells them apart
+MOVE_MASK = 0xFFF | (FLAG_PROMOTION | 3) << 12
+MAX_WEIGHT = 0xFFFF
+
+
+def encode_move(move: tuple) -> int:
+    flag = FLAG_QUIET
+    if len(move) > 2 and move[2]:
+        flag = FLAG_PROMOTION | PROMOTION_PIECES.index(move[2].upper())
+    return pack_move(move[0], move[1], flag)
+
+
+def decode_move(code: int) -> tuple:
+    return unpack_move(code & MOVE_MASK)
+
+
+class OpeningBook:
+    """Read-only view of a book file. The file is mapped on the first probe, not on construction."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._map = None
+        self._count = 0
+
+    def _open(self):
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._count = len(self._map) // ENTRY.size
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = self._file = None
+
+    def __getstate__(self):
+        # Only the path travels to worker processes; each maps the file itself
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def __len__(self) -> int:
+        if self._map is None:
+            self._open()
+        return self._count
+
+    def probe(self, key: int) -> List[Tuple[tuple, int]]:
+        """Returns the (move, weight) entries stored for a position key."""
+        if self._map is None:
+            self._open()
+        data, size = self._map, ENTRY.size
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if KEY.unpack_from(data, mid * size)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        entries = []
+        while lo < self._count:
+            entry_key, code, weight, _ = ENTRY.unpack_from(data, lo * size)
+            if entry_key != key:
+                break
+            entries.append((decode_move(code), weight))
+            lo += 1
+        return entries
+
+    def choose(self, game: Game, rng=random) -> Optional[tuple]:
+        """Picks a book move for the position at random, in proportion to the weights.
+
+        Moves that are not legal here (a key collision) are ignored; returns None when out of book.
+        """
+        entries = [(move, weight) for move, weight in self.probe(game.zobrist_key)
+                   if weight > 0 and game.piece_at(move[0]) is not None
+                   and game.piece_at(move[0]).color == game.to_move
+                   and move[1] in game.legal_moves_for(game.piece_at(move[0]))]
+        if not entries:
+            return None
+        pick = rng.uniform(0, sum(weight for _, weight in entries))
+        for move, weight in entries:
+            pick -= weight
+            if pick <= 0:
+                return move
+        return entries[-1][0]
+
+
+def build_book(pgn_paths: List[str], out_path: str, plies: int = 16, min_games: int = 1) -> int:
+    """Builds a book from the first `plies` moves of every game in the PGN files.
+
+    A move's weight is 2 per win and 1 per draw for the side that played it, so moves that
+    only ever lost stay in the book with weight 0 and are never chosen. Returns the entry count.
+    """
+    from pgn import read_games, san_to_move
+
+    stats: Dict[Tuple[int, int], List[int]] = {}
+    for path in pgn_paths:
+        with open(path, encoding="utf-8", errors="replace") as stream:
+            for pgn_game in read_games(stream):
+                points = {"1-0": (2, 0), "0-1": (0, 2), "1/2-1/2": (1, 1)}.get(pgn_game.result)
+                if points is None:
+                    continue
+                game = Game.from_fen(pgn_game.headers.get("FEN", START_FEN))
+                for san in pgn_game.moves[:plies]:
+                    try:
+                        move = san_to_move(game, san)
+                    except ValueError:
+                        break
+                    if not move[2]:
+                        move = move[:2]
+                    entry = stats.setdefault((game.zobrist_key, encode_move(move)), [0, 0])
+                    entry[0] += points[0] if game.to_move == "white" else points[1]
+                    entry[1] += 1
+                    game.push(move)
+
+    entries = sorted((key, code, weight, count) for (key, code), (weight, count) in stats.items()
+                     if count >= min_games)
+    if entries:
+        # Scale so the heaviest move still fits in 16 bits
+        scale = max(1, max(e[2] for e in entries) / MAX_WEIGHT)
+        entries = [(key, code, int(weight / scale), count) for key, code, weight, count in entries]
+    with open(out_path, "wb") as out:
+        for entry in entries:
+            out.write(ENTRY.pack(*entry))
+    return len(entries)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build or inspect an opening book.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build", help="build a book from PGN files")
+    p.add_argument("pgn", nargs="+")
+    p.add_argument("-o", "--out", default="book.bin")
+    p.add_argument("--plies", type=int, default=16, help="moves per game to take (default 16)")
+    p.add_argument("--min-games", type=int, default=1, help="drop moves seen in fewer games")
+    p = sub.add_parser("probe", help="list the book moves of a position")
+    p.add_argument("book")
+    p.add_argument("--fen", default=START_FEN)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        count = build_book(args.pgn, args.out, args.plies, args.min_games)
+        print(f"Wrote {count} entries to {args.out}")
+    else:
+        from pgn import move_to_san
+        game = Game.from_fen(args.fen)
+        book = OpeningBook(args.book)
+        entries = book.probe(game.zobrist_key)
+        total = sum(weight for _, weight in entries) or 1
+        for move, weight in sorted(entries, key=lambda e: -e[1]):
+            print(f"{move_to_san(game, move):<8} weight {weight:>5}  {100 * weight / total:5.1f}%")
+        if not entries:
+            print("Position not in book")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+# Root-parallel search: splits the root moves of each iterative-deepening depth across
+# worker processes. Pure-Python search holds the GIL, so threads would not add speed.
+# The first (previous best) move is searched on its own, then the rest are split across the
+# workers with its score as the bound to beat. Each worker has its own transposition table,
+# and the results are merged by score with ties going to the earlier root move, so the chosen
+# move does not depend on the number of workers or on which worker finishes first.
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from engine import Game, SearchTimeout, TranspositionTable, unpack_move
+
+
+def _search_share(game: Game, moves: List[int], depth: int, time_ms: Optional[float],
+                  bound: Optional[float] = None):
+    """Worker: alpha-beta over one share of the root moves.
+
+    Returns (score, packed move, nodes), where move is None if nothing beat the bound, or None on timeout.
+    """
+    game.tt = TranspositionTable(game.tt_size_mb)
+    game._deadline = time.perf_counter() + time_ms / 1000 if time_ms else None
+    try:
+        score, move = game._search_root(moves, depth, bound)
+    except SearchTimeout:
+        return None
+    return score, move, game.nodes
+
+
+class ParallelSearcher:
+    """Searches a Game's root moves on a pool of worker processes, kept alive between moves."""
+
+    def __init__(self, workers: Optional[int] = None, tt_size_mb: float = 16):
+        self.workers = workers or os.cpu_count() or 1
+        self.tt_size_mb = tt_size_mb
+        self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        self.search_info: Dict[str, object] = {}
+
+    def close(self):
+        self.pool.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def find_best_move(self, game: Game, time_ms: Optional[int] = None,
+                       max_depth: int = 2) -> Optional[tuple]:
+        """Iterative deepening like Game.find_best_move, with each depth split across the workers.
+
+        A depth counts only if every share finished inside time_ms; otherwise the best move of
+        the previous depth is returned. The game itself is not modified. A move found in the
+        game's opening book is returned without searching.
+        """
+        if game.book is not None:
+            book_move = game.book.choose(game)
+            if book_move is not None:
+                self.search_info = {"depth": 0, "move": book_move, "nodes": 0, "book": True}
+                return book_move
+        legal_moves = game.packed_moves(game.to_move)
+        if not legal_moves:
+            return None
+        if game.move_ordering:
+            game.order_moves(legal_moves, 0)
+        snapshot = game.copy()
+        snapshot.tt_size_mb = self.tt_size_mb
+        maximizing = game.to_move == "black"
+
+        start = time.perf_counter()
+        deadline = start + time_ms / 1000 if time_ms else None
+        best_move = legal_moves[0]
+        self.search_info = {}
+        nodes = 0
+        for depth in range(1, max_depth + 1):
+            remaining = (deadline - time.perf_counter()) * 1000 if deadline else None
+            if remaining is not None and remaining <= 0:
+                break
+            first = self.pool.submit(_search_share, snapshot, legal_moves[:1], depth, remaining).result()
+            if first is None:
+                break
+            # Round-robin shares, so the moves ordered first are spread over the workers
+            rest = legal_moves[1:]
+            remaining = (deadline - time.perf_counter()) * 1000 if deadline else None
+            futures = [self.pool.submit(_search_share, snapshot, rest[i::self.workers], depth, remaining, first[0])
+                       for i in range(min(self.workers, len(rest)))]
+            results = [first] + [f.result() for f in futures]
+            if any(r is None for r in results):
+                break
+            nodes += sum(r[2] for r in results)
+            rank = {move: i for i, move in enumerate(legal_moves)}
+            sign = 1 if maximizing else -1
+            score, best_move, _ = min((r for r in results if r[1] is not None),
+                                      key=lambda r: (-sign * r[0], rank[r[1]]))
+            legal_moves.remove(best_move)
+            legal_moves.insert(0, best_move)
+            self.search_info = {"depth": depth, "score": score, "move": unpack_move(best_move), "nodes": nodes,
+                                "workers": self.workers, "time_ms": (time.perf_counter() - start) * 1000}
+        return unpack_move(best_move)
@@ -0,0 +1,85 @@
+# Perft: counts the legal move tree of a position to a fixed depth.
+# Checks move generation against published node counts and times it in nodes per second.
+# Usage:
+#   python perft.py                          run the reference suite
+#   python perft.py --depth 4                run the suite down to depth 4
+#   python perft.py --fen "<fen>" --depth 3 --divide
+#   python perft.py --bitboards              use the bitboard backend
+
+import argparse
+import sys
+import time
+from typing import List, Optional, Tuple
+
+from engine import Game, START_FEN
+
+# (name, fen, expected node counts for depth 1, 2, ...) from the Chess Programming Wiki perft results
+REFERENCE_POSITIONS: List[Tuple[str, str, List[int]]] = [
+    ("start", START_FEN,
+     [20, 400, 8902, 197281, 4865609]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603]),
+    ("en passant and pins", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624]),
+    ("promotions and castling", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333]),
+    ("underpromotion", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487]),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594]),
+]
+
+def run_perft(game: Game, depth: int, divide: bool = False) -> Tuple[int, float]:
+    """Runs perft (optionally printing the per-move split) and returns (nodes, seconds)."""
+    start = time.perf_counter()
+    if divide:
+        counts = game.divide(depth)
+        elapsed = time.perf_counter() - start
+        for move in sorted(counts):
+            print(f"  {move}: {counts[move]}")
+        nodes = sum(counts.values())
+    else:
+        nodes = game.perft(depth)
+        elapsed = time.perf_counter() - start
+    return nodes, elapsed
+
+
+def _nps(nodes: int, seconds: float) -> int:
+    return int(nodes / seconds) if seconds > 0 else 0
+
+
+def run_suite(max_depth: int = 3, **game_kwargs) -> bool:
+    """Checks every reference position up to max_depth. Returns True if all counts match."""
+    all_ok = True
+    total_nodes, total_time = 0, 0.0
+    for name, fen, expected in REFERENCE_POSITIONS:
+        for depth, want in enumerate(expected[:max_depth], 1):
+            nodes, elapsed = run_perft(Game.from_fen(fen, **game_kwargs), depth)
+            ok = nodes == want
+            all_ok = all_ok and ok
+            total_nodes += nodes
+            total_time += elapsed
+            print(f"{'OK  ' if ok else 'FAIL'} {name:<24} depth {depth}: {nodes:>9} "
+                  f"(expected {want:>9}) {elapsed:7.2f}s {_nps(nodes, elapsed):>8} nps")
+    print(f"Total: {total_nodes} nodes in {total_time:.2f}s, {_nps(total_nodes, total_time)} nps")
+    return all_ok
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Perft move-generation counter and regression suite.")
+    parser.add_argument("--fen", help="position to count; runs the reference suite if omitted")
+    parser.add_argument("--depth", type=int, default=3, help="search depth (default 3)")
+    parser.add_argument("--divide", action="store_true", help="print the node count under each root move")
+    parser.add_argument("--bitboards", action="store_true", help="use the bitboard move generator")
+    args = parser.parse_args(argv)
+
+    if args.fen is None:
+        return 0 if run_suite(args.depth, use_bitboards=args.bitboards) else 1
+    game = Game.from_fen(args.fen, use_bitboards=args.bitboards)
+    nodes, elapsed = run_perft(game, args.depth, args.divide)
+    print(f"Nodes: {nodes}  Time: {elapsed:.2f}s  NPS: {_nps(nodes, elapsed)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+# PGN reading and writing. read_games() streams games one at a time from a file of any size;
+# write_game() serialises a Game's move history, e.g. a finished ChessGUI or self-play game.
+# Moves are decoded from and encoded to SAN (standard algebraic notation) against a Game.
+
+import re
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+
+from engine import Game, King, Pawn, Position, START_FEN, algebraic_to_pos, pos_to_algebraic
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+SEVEN_TAG_ROSTER = ["Event", "Site", "Date", "Round", "White", "Black", "Result"]
+SAN_PATTERN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?x?([a-h][1-8])(?:=?([NBRQ]))?$")
+TAG_PATTERN = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+# Comments, variations, NAGs and move numbers are split out so the parser can skip them
+MOVETEXT_TOKEN = re.compile(r"\{|\}|\(|\)|;|\$\d+|\d+\.+|[^\s{}();]+")
+
+
+class PGNGame:
+    """One game from a PGN file: its tag pairs, SAN moves and result."""
+
+    def __init__(self, headers: Dict[str, str], moves: List[str], result: str = "*"):
+        self.headers = headers
+        self.moves = moves
+        self.result = result
+
+    def replay(self, **game_kwargs) -> Game:
+        """Plays the moves through Game.make_move from the start (or the FEN tag) position."""
+        game = Game.from_fen(self.headers.get("FEN", START_FEN), **game_kwargs)
+        for san in self.moves:
+            src, dest, promotion = san_to_move(game, san)
+            if not game.make_move(src, dest, promotion):
+                raise ValueError("Illegal move in PGN: " + san)
+        return game
+
+
+# --- READING ---
+def read_games(source: TextIO) -> Iterator[PGNGame]:
+    """Yields the games of a PGN stream one by one, reading it a line at a time."""
+    headers: Dict[str, str] = {}
+    moves: List[str] = []
+    result = "*"
+    comment_depth = 0  # inside {...}
+    variation_depth = 0  # inside (...)
+    in_movetext = False
+    for line in source:
+        line = line.strip()
+        if comment_depth == 0 and variation_depth == 0 and line.startswith("["):
+            if in_movetext:
+                # A tag after movetext without a result starts the next game
+                yield PGNGame(headers, moves, result)
+                headers, moves, result, in_movetext = {}, [], "*", False
+            match = TAG_PATTERN.match(line)
+            if match:
+                headers[match.group(1)] = match.group(2)
+            continue
+        if line.startswith("%"):
+            continue
+        for token in MOVETEXT_TOKEN.findall(line):
+            if comment_depth:
+                if token == "}":
+                    comment_depth = 0
+                continue
+            if token == "{":
+                comment_depth = 1
+            elif token == ";":
+                break
+            elif token == "(":
+                variation_depth += 1
+            elif token == ")":
+                variation_depth = max(0, variation_depth - 1)
+            elif variation_depth or token[0] == "$" or token[0].isdigit() and token.endswith("."):
+                continue
+            elif token in RESULTS:
+                yield PGNGame(headers, moves, token)
+                headers, moves, result, in_movetext = {}, [], "*", False
+            else:
+                moves.append(token)
+                in_movetext = True
+    if moves or headers:
+        yield PGNGame(headers, moves, result)
+
+
+def san_to_move(game: Game, san: str) -> Tuple[Position, Position, Optional[str]]:
+    """Decodes a SAN move for the side to move into (src, dest, promotion symbol)."""
+    text = san.rstrip("+#!?")
+    color = game.to_move
+    if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+        king = game.kings[color]
+        dest = (king.row, 7 if len(text) == 3 else 3)
+        if dest not in game.legal_moves_for(king):
+            raise ValueError("Illegal castling: " + san)
+        return king.pos(), dest, None
+    match = SAN_PATTERN.match(text)
+    if match is None:
+        raise ValueError("Bad SAN move: " + san)
+    letter, from_file, from_rank, square, promotion = match.groups()
+    symbol = letter or "P"
+    symbol = symbol if color == "white" else symbol.lower()
+    dest = algebraic_to_pos(square)
+    candidates = []
+    for pos, p in list(game.pieces.items()):
+        if p.symbol != symbol:
+            continue
+        if from_file and pos_to_algebraic(pos)[0] != from_file:
+            continue
+        if from_rank and pos[0] != int(from_rank):
+            continue
+        if dest in game.legal_moves_for(p):
+            candidates.append(pos)
+    if len(candidates) != 1:
+        raise ValueError(("Ambiguous" if candidates else "Illegal") + " SAN move: " + san)
+    if symbol.upper() == "P" and dest[0] in (1, 8):
+        promotion = promotion or "Q"
+    return candidates[0], dest, promotion
+
+
+# --- WRITING ---
+def move_to_san(game: Game, move: tuple) -> str:
+    """Encodes a legal move (src, dest[, promotion]) of the side to move in SAN."""
+    src, dest = move[0], move[1]
+    p = game.pieces[src]
+    if isinstance(p, King) and abs(dest[1] - src[1]) == 2:
+        san = "O-O" if dest[1] == 7 else "O-O-O"
+    else:
+        capture = game.arr[dest[0]-1][dest[1]-1] != " " or (isinstance(p, Pawn) and dest[1] != src[1])
+        square = pos_to_algebraic(dest)
+        if isinstance(p, Pawn):
+            san = (pos_to_algebraic(src)[0] + "x" if capture else "") + square
+            if dest[0] in (1, 8):
+                san += "=" + (move[2] if len(move) > 2 and move[2] else "Q").upper()
+        else:
+            rivals = [pos for pos, other in list(game.pieces.items())
+                      if other is not p and other.symbol == p.symbol and dest in game.legal_moves_for(other)]
+            hint = ""
+            if rivals:
+                file, rank = pos_to_algebraic(src)
+                if all(pos[1] != src[1] for pos in rivals):
+                    hint = file
+                elif all(pos[0] != src[0] for pos in rivals):
+                    hint = rank
+                else:
+                    hint = file + rank
+            san = p.symbol.upper() + hint + ("x" if capture else "") + square
+    game.push(move)
+    if game.in_check(game.to_move):
+        san += "+" if game.has_any_legal_moves(game.to_move) else "#"
+    game.pop()
+    return san
+
+
+def game_result(game: Game) -> str:
+    """The PGN result of the current position: 1-0, 0-1, 1/2-1/2, or * if still in play."""
+    if game.has_any_legal_moves(game.to_move):
+        return "*"
+    if not game.in_check(game.to_move):
+        return "1/2-1/2"
+    return "0-1" if game.to_move == "white" else "1-0"
+
+
+def game_to_pgn(game: Game, headers: Optional[Dict[str, str]] = None) -> str:
+    """Serialises the moves played on game (its undo history) as one PGN game."""
+    moves = [record[0] for record in game._undo_stack]
+    # Step back to where the history starts, then replay it move by move to get the SAN
+    for _ in moves:
+        game.pop()
+    start_fen = game.to_fen()
+    first_number, black_first = game.move_number, game.to_move == "black"
+    sans = []
+    for move in moves:
+        sans.append(move_to_san(game, move))
+        game.push(move)
+
+    tags = {name: "?" for name in SEVEN_TAG_ROSTER}
+    tags["Date"] = "????.??.??"
+    tags["Result"] = game_result(game)
+    if start_fen != START_FEN:
+        tags["SetUp"], tags["FEN"] = "1", start_fen
+    tags.update(headers or {})
+    lines = [f'[{name} "{value}"]' for name, value in tags.items()]
+
+    tokens = []
+    for i, san in enumerate(sans):
+        ply = i + black_first
+        if ply % 2 == 0:
+            tokens.append(f"{first_number + ply // 2}.")
+        elif i == 0:
+            tokens.append(f"{first_number}...")
+        tokens.append(san)
+    tokens.append(tags["Result"])
+    # Wrap movetext below 80 columns
+    movetext, row = [], ""
+    for token in tokens:
+        if row and len(row) + 1 + len(token) > 79:
+            movetext.append(row)
+            row = token
+        else:
+            row = f"{row} {token}" if row else token
+    movetext.append(row)
+    return "\n".join(lines) + "\n\n" + "\n".join(movetext) + "\n"
+
+
+def write_game(out: TextIO, game: Game, headers: Optional[Dict[str, str]] = None):
+    """Appends game to an open PGN stream, followed by the blank line that separates games."""
+    out.write(game_to_pgn(game, headers))
+    out.write("\n")
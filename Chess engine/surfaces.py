@@ -0,0 +1,119 @@
+# Drawing helpers shared by the two pygame front ends (Chessboard.py and main.py).
+# SurfaceCache: rendered text, translucent overlays and scaled images are made the first time
+# they are asked for and reused on every later frame, so drawing a frame allocates no new
+# surfaces. Entries are keyed by what the surface shows (text, colour, size, ...) and the least
+# recently used ones are dropped past max_entries, so changing text such as a node count
+# cannot grow the cache without bound.
+# DirtyRenderer: compares each frame with the one on screen and repaints and pushes to the
+# display only the squares and panels that changed.
+
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import pygame
+
+Color = Tuple[int, ...]
+Position = Tuple[int, int]
+
+
+class SurfaceCache:
+    """Surfaces built once and reused, keyed by what they show."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._surfaces: "OrderedDict[Hashable, pygame.Surface]" = OrderedDict()
+        self.created = 0  # surfaces built so far; compare between frames to count allocations
+
+    def get(self, key: Hashable, make: Callable[[], pygame.Surface]) -> pygame.Surface:
+        """The surface stored under key, building it with make() the first time."""
+        surface = self._surfaces.get(key)
+        if surface is None:
+            surface = self._surfaces[key] = make()
+            self.created += 1
+            if len(self._surfaces) > self.max_entries:
+                self._surfaces.popitem(last=False)
+        else:
+            self._surfaces.move_to_end(key)
+        return surface
+
+    def text(self, font: pygame.font.Font, text: str, color: Color) -> pygame.Surface:
+        return self.get(("text", font, text, color), lambda: font.render(text, True, color))
+
+    def fill(self, size: Tuple[int, int], color: Color) -> pygame.Surface:
+        """A surface of the given size filled with color, which may be translucent."""
+        def make():
+            surface = pygame.Surface(size, pygame.SRCALPHA)
+            surface.fill(color)
+            return surface
+        return self.get(("fill", size, color), make)
+
+    def scaled(self, name: Hashable, image: pygame.Surface, size: Tuple[int, int]) -> pygame.Surface:
+        """image scaled to size; name identifies the image (e.g. its piece symbol)."""
+        return self.get(("scaled", name, size), lambda: pygame.transform.scale(image, size))
+
+    def shade(self, target: pygame.Surface, rect, color: Color = (0, 0, 0, 150)):
+        """Covers rect of target with a translucent fill, e.g. to dim the board under a dialog."""
+        rect = pygame.Rect(rect)
+        target.blit(self.fill(rect.size, color), rect)
+
+    def clear(self):
+        self._surfaces.clear()
+
+
+def square_rect(pos: Position, origin: Tuple[int, int], square_size: int) -> pygame.Rect:
+    """The screen rectangle of square (row, col) on a board with its top-left corner at origin and rank 8 on top."""
+    return pygame.Rect(origin[0] + (pos[1] - 1) * square_size, origin[1] + (8 - pos[0]) * square_size,
+                       square_size, square_size)
+
+
+def square_state(symbol: Optional[str], pos: Position, selected: Optional[Position],
+                 valid_moves: Iterable[Position], check_pos: Optional[Position]) -> tuple:
+    """Everything that decides how a square looks: (piece symbol, selected, move target, king in check)."""
+    return (symbol, pos == selected, pos in valid_moves, pos == check_pos)
+
+
+class DirtyRenderer:
+    """Draws frames of a board GUI, repainting only the squares and panels that changed since the last one.
+
+    A frame is the state of every square (see square_state), the sidebar's state and the overlay's
+    state, None when no promotion dialog or game-over screen shows. Only the changed rectangles are
+    pushed to the display, so an idle board costs almost nothing. The first frame, and every frame
+    that shows or stops showing an overlay, goes through draw_all and a full flip, since overlays
+    cover everything under them.
+    """
+
+    def __init__(self, draw_all: Callable[[Dict[Position, tuple]], None],
+                 draw_square: Callable[[Position, tuple], None], square_rect: Callable[[Position], pygame.Rect],
+                 draw_sidebar: Callable[[], None], sidebar_rect):
+        self.draw_all = draw_all
+        self.draw_square = draw_square  # repaints one square, background included
+        self.square_rect = square_rect
+        self.draw_sidebar = draw_sidebar  # repaints the sidebar, background included
+        self.sidebar_rect = pygame.Rect(sidebar_rect)
+        self.drawn: Optional[tuple] = None
+
+    def invalidate(self):
+        """Forgets what is on screen, so the next frame is drawn in full (e.g. after a menu covered it)."""
+        self.drawn = None
+
+    def render(self, squares: Dict[Position, tuple], sidebar: Hashable, overlay: Optional[Hashable]) -> bool:
+        """Brings the screen up to date with the frame and returns whether anything was drawn."""
+        frame = (squares, sidebar, overlay)
+        drawn = self.drawn
+        if frame == drawn:
+            return False
+        if drawn is None or overlay or drawn[2]:
+            self.draw_all(squares)
+            pygame.display.flip()
+        else:
+            dirty = []
+            for pos, state in squares.items():
+                if drawn[0][pos] != state:
+                    self.draw_square(pos, state)
+                    dirty.append(self.square_rect(pos))
+            if sidebar != drawn[1]:
+                self.draw_sidebar()
+                dirty.append(self.sidebar_rect)
+            pygame.display.update(dirty)
+        self.drawn = frame
+        return True
@@ -0,0 +1,208 @@
+# Headless self-play tournaments between engine configurations, played with Game.ai_move.
+# Games run on a process pool; each finished game is appended to a JSON-lines file (and
+# optionally a PGN file) as soon as it ends, and the Elo difference of every pairing is
+# reported with a 95% error bar.
+# Usage:
+#   python tournament.py --engine "d2:depth=2" --engine "d3:depth=3" --games 100 --out results.jsonl
+#   engine options: depth, time (ms per move), quiescence, ordering, pst (0/1), tt (MB), book (path)
+#   depth defaults to 2, or to no practical limit when a time is given; with both, the
+#   search stops at whichever is reached first.
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional, Tuple
+
+from engine import Game, Bishop, Knight, MAX_PLY, START_FEN
+from opening_book import OpeningBook
+from pgn import game_to_pgn
+
+MAX_PLIES = 300
+
+
+class EngineConfig:
+    """Search settings for one tournament entrant."""
+
+    def __init__(self, name: str, depth: Optional[int] = None, time_ms: Optional[int] = None, quiescence: bool = True,
+                 ordering: bool = True, pst: bool = True, tt_mb: float = 16, book: Optional[str] = None):
+        self.name = name
+        # A timed engine deepens until its time runs out unless a depth is given as well
+        if depth is None:
+            depth = MAX_PLY if time_ms else 2
+        self.depth = depth
+        self.time_ms = time_ms
+        self.quiescence = quiescence
+        self.ordering = ordering
+        self.pst = pst
+        self.tt_mb = tt_mb
+        self.book = book
+
+    @classmethod
+    def parse(cls, spec: str) -> "EngineConfig":
+        """Parses "name:depth=3,time=200,pst=0" style specs."""
+        name, _, options = spec.partition(":")
+        kwargs = {}
+        for option in filter(None, options.split(",")):
+            key, _, value = option.partition("=")
+            if key == "depth":
+                kwargs["depth"] = int(value)
+            elif key == "time":
+                kwargs["time_ms"] = int(value)
+            elif key == "tt":
+                kwargs["tt_mb"] = float(value)
+            elif key == "book":
+                kwargs["book"] = value
+            elif key in ("quiescence", "ordering", "pst"):
+                kwargs[key] = value not in ("0", "false", "off")
+            else:
+                raise ValueError("Unknown engine option: " + key)
+        return cls(name, **kwargs)
+
+    def __repr__(self):
+        return f"EngineConfig({self.name!r}, depth={self.depth}, time_ms={self.time_ms})"
+
+
+def _insufficient_material(game: Game) -> bool:
+    others = [p for p in game.pieces.values() if p.symbol.upper() != "K"]
+    return not others or (len(others) == 1 and isinstance(others[0], (Bishop, Knight)))
+
+
+def play_game(white: EngineConfig, black: EngineConfig, seed: int, start_fen: str = START_FEN,
+              max_plies: int = MAX_PLIES) -> Dict[str, object]:
+    """Plays one game between two configurations and returns its result record."""
+    random.seed(seed)  # find_best_move shuffles the root moves
+    game = Game.from_fen(start_fen)
+    engines = {"white": white, "black": black}
+    # Each side keeps its own transposition table and history between its moves
+    tables = {"white": (None, {}), "black": (None, {})}
+    books = {color: OpeningBook(config.book) if config.book else None for color, config in engines.items()}
+    seen: Dict[int, int] = {game.zobrist_key: 1}
+    result, reason = "1/2-1/2", "move limit"
+    start = time.perf_counter()
+    for _ in range(max_plies):
+        color = game.to_move
+        if not game.has_any_legal_moves(color):
+            if game.in_check(color):
+                result, reason = ("0-1" if color == "white" else "1-0"), "checkmate"
+            else:
+                reason = "stalemate"
+            break
+        if game.halfmove_clock >= 100:
+            reason = "fifty moves"
+            break
+        if _insufficient_material(game):
+            reason = "insufficient material"
+            break
+        config = engines[color]
+        game.tt_size_mb = config.tt_mb
+        game.tt, game.history = tables[color]
+        game.use_quiescence, game.move_ordering, game.use_pst = config.quiescence, config.ordering, config.pst
+        game.book = books[color]
+        game.ai_move(time_ms=config.time_ms, max_depth=config.depth)
+        tables[color] = (game.tt, game.history)
+        seen[game.zobrist_key] = seen.get(game.zobrist_key, 0) + 1
+        if seen[game.zobrist_key] >= 3:
+            reason = "repetition"
+            break
+    return {"white": white.name, "black": black.name, "result": result, "reason": reason,
+            "plies": len(game._undo_stack), "seed": seed, "seconds": round(time.perf_counter() - start, 3),
+            "pgn": game_to_pgn(game, {"Event": "Self-play", "White": white.name, "Black": black.name,
+                                      "Result": result})}
+
+
+def elo_difference(wins: int, draws: int, losses: int) -> Tuple[float, float, float]:
+    """Elo difference for the side with these results, with the low and high ends of a 95% interval."""
+    n = wins + draws + losses
+    if n == 0:
+        return 0.0, -math.inf, math.inf
+    score = (wins + draws / 2) / n
+    variance = (wins + draws / 4) / n - score * score
+    margin = 1.96 * math.sqrt(variance / n)
+
+    def to_elo(s: float) -> float:
+        if s <= 0:
+            return -math.inf
+        if s >= 1:
+            return math.inf
+        return -400 * math.log10(1 / s - 1)
+
+    return to_elo(score), to_elo(score - margin), to_elo(score + margin)
+
+
+def run_tournament(engines: List[EngineConfig], games: int, workers: Optional[int] = None,
+                   out_path: str = "results.jsonl", pgn_path: Optional[str] = None, seed: int = 0):
+    """Round robin: every pairing plays `games` games with colours alternating. Results are streamed to disk."""
+    jobs = []
+    for a, b in itertools.combinations(engines, 2):
+        for i in range(games):
+            white, black = (a, b) if i % 2 == 0 else (b, a)
+            jobs.append((white, black, seed + len(jobs)))
+    # Per pairing: wins, draws and losses of the first engine of the pair
+    tally = {(a.name, b.name): [0, 0, 0] for a, b in itertools.combinations(engines, 2)}
+
+    start = time.perf_counter()
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(out_path, "a") as out:
+        pgn_out = open(pgn_path, "a") if pgn_path else None
+        try:
+            futures = [pool.submit(play_game, white, black, game_seed) for white, black, game_seed in jobs]
+            for future in as_completed(futures):
+                record = future.result()
+                if pgn_out:
+                    pgn_out.write(record["pgn"] + "\n")
+                    pgn_out.flush()
+                out.write(json.dumps(record) + "\n")
+                out.flush()
+                key = (record["white"], record["black"])
+                first_is_white = key in tally
+                wdl = tally[key if first_is_white else key[::-1]]
+                if record["result"] == "1/2-1/2":
+                    wdl[1] += 1
+                elif (record["result"] == "1-0") == first_is_white:
+                    wdl[0] += 1
+                else:
+                    wdl[2] += 1
+                done += 1
+                minutes = (time.perf_counter() - start) / 60
+                print(f"[{done}/{len(jobs)}] {record['white']} - {record['black']} {record['result']} "
+                      f"({record['reason']}, {record['plies']} plies)  {done / minutes:.1f} games/min")
+        finally:
+            if pgn_out:
+                pgn_out.close()
+
+    print()
+    for (a, b), (wins, draws, losses) in tally.items():
+        elo, low, high = elo_difference(wins, draws, losses)
+        print(f"{a} vs {b}: +{wins} ={draws} -{losses}  Elo {elo:+.0f} (95% {low:+.0f} .. {high:+.0f})")
+    minutes = (time.perf_counter() - start) / 60
+    print(f"{done} games in {minutes:.1f} min, {done / minutes:.1f} games/min")
+    return tally
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Headless self-play tournament between engine configurations.")
+    parser.add_argument("--engine", action="append", required=True,
+                        help='entrant as "name:depth=3,time=200,quiescence=1,ordering=1,pst=1,tt=16,book=book.bin"; '
+                             'give two or more')
+    parser.add_argument("--games", type=int, default=20, help="games per pairing (default 20)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--out", default="results.jsonl", help="JSON-lines file results are appended to")
+    parser.add_argument("--pgn", default=None, help="also append every game to this PGN file")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    engines = [EngineConfig.parse(spec) for spec in args.engine]
+    if len(engines) < 2 or len({e.name for e in engines}) != len(engines):
+        parser.error("need at least two engines with distinct names")
+    run_tournament(engines, args.games, args.workers, args.out, args.pgn, args.seed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())